@@ -0,0 +1,103 @@
+import numpy as np
+
+from ArrayStore import ArrayStoreType
+
+
+def GroupedRanges(starts, ends):
+    # flatten the ranges [starts[i], ends[i]) into one array
+    # returns (owner, ids) where owner[j] is the index i of the range that ids[j] came from
+    lens = np.maximum(ends - starts, 0)
+    owner = np.repeat(np.arange(len(lens)), lens)
+    firsts = np.cumsum(lens) - lens
+    ids = np.arange(owner.size) - firsts[owner] + starts[owner]
+    return owner, ids
+
+
+class AdjacencyType:  # compressed sparse row lists: the neighbours of guy i are indices[indptr[i]:indptr[i + 1]]
+    def __init__(self, indptr, indices):
+        self.indptr = indptr    # type: np.ndarray  # int64, nPeeps + 1
+        self.indices = indices  # type: np.ndarray  # int32, sorted within each row
+
+    @classmethod
+    def FromCounts(cls, counts, indices):
+        indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        return cls(indptr, indices.astype(np.int32))
+
+    @classmethod
+    def FromRanges(cls, starts, ends):
+        # row i is the range [starts[i], ends[i])
+        owner, ids = GroupedRanges(starts, ends)
+        return cls.FromCounts(np.maximum(ends - starts, 0), ids)
+
+    @classmethod
+    def FromBlocks(cls, starts, ends, store=None, name='blocks'):
+        # blocks of adjacent rows, in order: each row of block i is the range [starts[i], ends[i])
+        # built a chunk of blocks at a time, so store can keep the arrays in files
+        store = store or ArrayStoreType()
+        sizes = (ends - starts).astype(np.int64)
+        nIndices = int(np.dot(sizes, sizes))
+        indptr = store.Zeros(name + '.indptr', int(sizes.sum()) + 1, np.int64)
+        indices = store.Zeros(name + '.indices', nIndices, np.int32)
+
+        chunk = max(1, store.chunk * len(sizes) // max(1, nIndices))
+        for first in range(0, len(sizes), chunk):
+            last = min(first + chunk, len(sizes))
+            rowStarts = np.repeat(starts[first:last], sizes[first:last])
+            rowEnds = np.repeat(ends[first:last], sizes[first:last])
+            rows = starts[first] + np.arange(rowStarts.size)
+
+            base = indptr[rows[0]]
+            indptr[rows + 1] = base + np.cumsum(rowEnds - rowStarts)
+            indices[base:indptr[rows[-1] + 1]] = GroupedRanges(rowStarts, rowEnds)[1]
+
+        return cls(indptr, indices)
+
+    @classmethod
+    def FromLists(cls, lists):
+        lens = np.array([len(x) for x in lists], dtype=np.int64)
+        indptr = np.zeros(len(lists) + 1, dtype=np.int64)
+        np.cumsum(lens, out=indptr[1:])
+        if indptr[-1] == 0:
+            return cls(indptr, np.zeros(0, dtype=np.int32))
+
+        indices = np.concatenate([np.asarray(x, dtype=np.int32) for x in lists])
+        return cls(indptr, indices)
+
+    def Row(self, ii):
+        return self.indices[self.indptr[ii]:self.indptr[ii + 1]]
+
+    def Degree(self, rows):
+        return self.indptr[rows + 1] - self.indptr[rows]
+
+    def First(self, rows):
+        return self.indices[self.indptr[rows]]
+
+    def Last(self, rows):
+        return self.indices[self.indptr[rows + 1] - 1]
+
+    def Gather(self, rows):
+        # the neighbours of all rows in one flat array: (index into rows, neighbour)
+        owner, pos = GroupedRanges(self.indptr[rows], self.indptr[rows + 1])
+        return owner, self.indices[pos].astype(int)
+
+    def Contains(self, rows, ids):
+        # is ids[j] a neighbour of rows[j]?  bisect every row at once
+        if self.indices.size == 0:
+            return np.zeros(len(ids), dtype=bool)
+
+        lo = self.indptr[rows].copy()
+        hi = self.indptr[rows + 1].copy()
+        while True:
+            active = lo < hi
+            if not active.any():
+                break
+
+            mid = (lo + hi) // 2
+            below = active & (self.indices[np.minimum(mid, self.indices.size - 1)] < ids)
+            lo = np.where(below, mid + 1, lo)
+            hi = np.where(active & ~below, mid, hi)
+
+        found = lo < self.indptr[rows + 1]
+        found[found] = self.indices[lo[found]] == ids[found]
+        return found
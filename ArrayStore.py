@@ -0,0 +1,43 @@
+import os
+import tempfile
+
+import numpy as np
+
+
+class ArrayStoreType:  # where the per-guy arrays of a population live: in RAM, or in np.memmap files in folder
+    chunk = 1 << 20  # guys per pass when a whole array is filled or copied: the pages are touched in order
+
+    def __init__(self, folder=None):
+        self.folder = folder
+        self.fileNames = []  # the files of the arrays made since the last Release
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    def Zeros(self, name, shape, dtype):
+        # a new file is sparse: the pages are only written as the model touches them
+        if not self.folder or int(np.prod(shape)) == 0:
+            return np.zeros(shape, dtype=dtype)
+
+        handle, fileName = tempfile.mkstemp(prefix=name + '.', suffix='.npy', dir=self.folder)
+        os.close(handle)
+        self.fileNames.append(fileName)
+        return np.lib.format.open_memmap(fileName, mode='w+', dtype=dtype, shape=tuple(np.atleast_1d(shape)))
+
+    def Full(self, name, shape, value, dtype):
+        array = self.Zeros(name, shape, dtype)
+        flat = array.reshape(-1)
+        for first in range(0, flat.size, self.chunk):
+            flat[first:first + self.chunk] = value
+
+        return array
+
+    def Release(self):
+        # the files go once nothing maps them: the model drops its arrays on the next Reset
+        kept = []
+        for fileName in self.fileNames:
+            try:
+                os.remove(fileName)
+            except OSError:
+                kept.append(fileName)  # still mapped on Windows: tried again on the next Release
+
+        self.fileNames = kept
@@ -0,0 +1,207 @@
+import json
+
+import numpy as np
+
+from Adjacency import AdjacencyType
+from ArrayStore import ArrayStoreType
+from ContactLog import ContactLogType
+from EnsembleStats import EnsembleStatsType
+from EventCalendar import EventCalendarType
+from IndexSet import IndexSetType
+from RandomPool import RandomPoolType
+from SirModel import SirModel, ControlsType, Cols, PopulationType, SpreadMode, StatType
+
+# a checkpoint file:
+#   magic, the length of the header as 8 bytes little endian, the json header,
+#   then the arrays, each starting on an `align` boundary of the file
+magic = b'SIRCKPT1'
+align = 64
+
+indexSets = ('infected', 'recovered', 'dead', 'isolated', 'alerted', 'testable')
+
+
+def Aligned(n):
+    return -(-n // align) * align
+
+
+def WriteArrays(fileName, header, arrays):
+    # header: json-able dict. arrays: name -> array
+    table = {}
+    offset = 0
+    for name, array in arrays.items():
+        table[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset = Aligned(offset + array.nbytes)
+
+    header = dict(header, arrays=table)
+    text = json.dumps(header).encode()
+    start = Aligned(len(magic) + 8 + len(text))
+
+    with open(fileName, 'wb') as file:
+        file.write(magic)
+        file.write(len(text).to_bytes(8, 'little'))
+        file.write(text)
+        for name, array in arrays.items():
+            # a chunk at a time: the array may be a map of a population bigger than RAM
+            file.seek(start + table[name]['offset'])
+            flat = np.ascontiguousarray(array).reshape(-1)
+            for first in range(0, flat.size, ArrayStoreType.chunk):
+                file.write(flat[first:first + ArrayStoreType.chunk].tobytes())
+
+        file.truncate(start + offset)
+
+
+def ReadArrays(fileName):
+    # the header, and name -> array: copy-on-write maps of the file, so changing them leaves the file alone
+    with open(fileName, 'rb') as file:
+        if file.read(len(magic)) != magic:
+            raise ValueError(fileName + ' is not a SirModel checkpoint')
+
+        size = int.from_bytes(file.read(8), 'little')
+        header = json.loads(file.read(size).decode())
+
+    start = Aligned(len(magic) + 8 + size)
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        dtype, shape = np.dtype(entry['dtype']), tuple(entry['shape'])
+        if int(np.prod(shape)) == 0:
+            arrays[name] = np.zeros(shape, dtype=dtype)
+        else:
+            arrays[name] = np.memmap(fileName, dtype=dtype, mode='c', offset=start + entry['offset'], shape=shape)
+
+    return header, arrays
+
+
+def SaveCheckpoint(model, fileName):
+    # everything a day of the model depends on, so a run can go on from here
+    with model.lock:
+        header = {'day': model.day,
+                  'Sample': model.Sample,
+                  'Seed': model.Seed,
+                  'Stream': model.Stream,
+                  'controls': list(model.Controls),
+                  'cs': list(model.cs),
+                  'SceneTitle': model.SceneTitle,
+                  'spreadMode': int(model.spreadMode),
+                  'TotalInfected': int(model.TotalInfected),
+                  'newInfected': int(model.newInfected),
+                  'nRecoveredOrDead': int(model.nRecoveredOrDead),
+                  'sipEndDay': model.sipEndDay,
+                  'nPeeps': model.data.nPeeps,
+                  'gridCols': model.data.gridCols,
+                  'rng': model.rng.bit_generator.state,
+                  'paired': model.paired,
+                  'randoms': {'usedToday': model.randoms.usedToday, 'usedYesterday': model.randoms.usedYesterday,
+                              'keySeed': int(model.randoms.keySeed)},
+                  'stats': {'nSamples': model.Stats.nSamples, 'nDays': model.Stats.nDays, 'nKept': model.Stats.nKept,
+                            'reservoirSize': model.Stats.reservoirSize, 'rng': model.Stats.rng.bit_generator.state}}
+
+        arrays = {}
+        for col, column in model.data.columns.items():
+            arrays['data.' + Cols(col).name] = column
+
+        for name in ('family', 'friends'):
+            arrays[name + '.indptr'] = getattr(model, name).indptr
+            arrays[name + '.indices'] = getattr(model, name).indices
+
+        log = model.contactLog
+        for name in ('source', 'contact', 'day'):
+            arrays['contactLog.' + name] = getattr(log, name)[:log.size]
+
+        for name in indexSets:
+            arrays[name] = getattr(model, name).Items()
+        arrays['isolatedToday'] = model.isolatedToday
+
+        # the calendar: a (day, event, n guys) row per bucket, and the guys of all the buckets
+        keys = sorted(model.calendar.buckets)
+        buckets = [np.concatenate(model.calendar.buckets[key]) for key in keys]
+        arrays['calendar.keys'] = np.array([(day, event, len(ids)) for (day, event), ids in zip(keys, buckets)],
+                                           dtype=np.int64).reshape(-1, 3)
+        arrays['calendar.ids'] = np.concatenate(buckets) if buckets else np.zeros(0, dtype=np.int64)
+
+        arrays['randoms.block'] = model.randoms.block[model.randoms.next:]
+        arrays['RunStats'] = model.RunStats
+        arrays['Stats.mean'] = model.Stats.mean
+        arrays['Stats.m2'] = model.Stats.m2
+        arrays['Stats.reservoir'] = model.Stats.reservoir[:model.Stats.nKept]
+
+        WriteArrays(fileName, header, arrays)
+
+
+def LoadCheckpoint(fileName, model=None, folder=None):
+    # a model as it was saved: into model if given, or a new one keeping its index sets in folder.
+    # the population columns and the adjacency are maps of the file: pages are read as the days touch them
+    header, arrays = ReadArrays(fileName)
+
+    controls = ControlsType(header['controls'])
+    if model is None:
+        model = SirModel(controls, header['Seed'], reset=False, folder=folder)
+
+    with model.lock:
+        model.Controls.values = controls.values
+        model.cs = list(header['cs'])
+        model.Seed = header['Seed']
+        model.Stream = header['Stream']
+        model.Sample = header['Sample']
+        model.day = header['day']
+        model.SceneTitle = header['SceneTitle']
+        model.spreadMode = SpreadMode(header['spreadMode'])
+        model.TotalInfected = header['TotalInfected']
+        model.newInfected = header['newInfected']
+        model.nRecoveredOrDead = header['nRecoveredOrDead']
+        model.sipEndDay = header['sipEndDay']
+        model.ResetStats = False
+
+        nPeeps = header['nPeeps']
+        model.store.Release()
+        model.data = PopulationType(0, header['gridCols'])
+        model.data.nPeeps = nPeeps
+        for col in model.data.columns:
+            model.data.columns[col] = arrays['data.' + Cols(col).name]
+
+        for name in ('family', 'friends'):
+            setattr(model, name, AdjacencyType(arrays[name + '.indptr'], arrays[name + '.indices']))
+
+        model.contactLog = ContactLogType(max(1024, len(arrays['contactLog.source'])))
+        model.contactLog.Append(arrays['contactLog.source'], arrays['contactLog.contact'], 0)
+        model.contactLog.day[:model.contactLog.size] = arrays['contactLog.day']
+
+        # in the order they were saved: the testing picks depend on it
+        for name in indexSets:
+            indexSet = IndexSetType(nPeeps, model.store, name)
+            members = arrays[name]
+            indexSet.members[:members.size] = members
+            indexSet.where[members] = np.arange(members.size)
+            indexSet.size = members.size
+            setattr(model, name, indexSet)
+        model.isolatedToday = np.array(arrays['isolatedToday'])
+
+        model.calendar = EventCalendarType()
+        first = 0
+        for day, event, n in arrays['calendar.keys']:
+            model.calendar.buckets[(int(day), int(event))] = [np.array(arrays['calendar.ids'][first:first + n])]
+            first += n
+
+        model.rng = np.random.default_rng()
+        model.rng.bit_generator.state = header['rng']
+        model.randoms = RandomPoolType(model.rng, header['randoms'].get('keySeed', 0))
+        model.paired = header.get('paired', False)
+        model.randoms.block = np.array(arrays['randoms.block'])
+        model.randoms.usedToday = header['randoms']['usedToday']
+        model.randoms.usedYesterday = header['randoms']['usedYesterday']
+
+        model.RunStats = np.array(arrays['RunStats'])
+
+        stats = header['stats']
+        generation = model.Stats.generation + 1  # copies of the stats before the load are out of date
+        model.Stats = EnsembleStatsType(StatType.lastRunStat, stats['reservoirSize'])
+        model.Stats.generation = generation
+        model.Stats.rng.bit_generator.state = stats['rng']
+        model.Stats.nSamples = stats['nSamples']
+        model.Stats.nDays = stats['nDays']
+        model.Stats.nKept = stats['nKept']
+        model.Stats.mean = np.array(arrays['Stats.mean'])
+        model.Stats.m2 = np.array(arrays['Stats.m2'])
+        model.Stats.reservoir = np.zeros((stats['reservoirSize'],) + arrays['Stats.mean'].shape[1:])
+        model.Stats.reservoir[:stats['nKept']] = arrays['Stats.reservoir']
+
+    return model
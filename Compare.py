@@ -0,0 +1,142 @@
+import argparse
+import csv
+import time
+from statistics import NormalDist
+
+import numpy as np
+
+from Ensemble import RunEnsemble, RunSamples, Outcomes, OutcomeType
+from ResultCache import ResultCacheType
+from Scenario import ControlsTable
+from SirModel import SirModel
+
+
+class ComparisonType:  # the outcomes of control sets run on the same samples, and their differences from a baseline
+    def __init__(self, names, outcomes, baseline=0, confidence=0.95):
+        self.names = names
+        self.outcomes = outcomes  # name x sample x OutcomeType
+        self.baseline = baseline  # the index of the name the others are compared with
+        self.z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+    def Means(self):
+        return self.outcomes.mean(axis=1)
+
+    def Differences(self):
+        # name x sample x OutcomeType: each sample less the same sample of the baseline
+        return self.outcomes - self.outcomes[self.baseline]
+
+    def PairedHalfWidths(self):
+        # name x OutcomeType: the confidence interval of the mean difference, from the paired differences
+        nSamples = self.outcomes.shape[1]
+        return self.z * self.Differences().std(axis=1, ddof=1) / np.sqrt(nSamples)
+
+    def UnpairedHalfWidths(self):
+        # the same interval had the samples been independent: from the variance of each name on its own
+        nSamples = self.outcomes.shape[1]
+        var = self.outcomes.var(axis=1, ddof=1)
+        return self.z * np.sqrt((var + var[self.baseline]) / nSamples)
+
+    def SampleRatios(self):
+        # how many times more samples independent runs would need for the same interval
+        paired = self.PairedHalfWidths()
+        unpaired = self.UnpairedHalfWidths()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = np.where(paired > 0, (unpaired / paired) ** 2, np.inf)
+        ratios[self.baseline] = np.nan  # the baseline against itself
+        return ratios
+
+    def Report(self):
+        means, paired = self.Means(), self.PairedHalfWidths()
+        unpaired, ratios = self.UnpairedHalfWidths(), self.SampleRatios()
+        lines = ['{} samples each, differences from {}: paired interval, independent interval, '
+                 'samples saved'.format(self.outcomes.shape[1], self.names[self.baseline])]
+        for outcome in range(OutcomeType.lastOutcome):
+            lines.append(OutcomeType(outcome).name)
+            for n, name in enumerate(self.names):
+                if n == self.baseline:
+                    lines.append('  {:<16}{:>10.1f}'.format(name, means[n, outcome]))
+                    continue
+
+                lines.append('  {:<16}{:>10.1f}  {:>+10.1f} +- {:<8.1f} (+- {:.1f}, x{:.1f})'.format(
+                    name, means[n, outcome], means[n, outcome] - means[self.baseline, outcome],
+                    paired[n, outcome], unpaired[n, outcome], ratios[n, outcome]))
+
+        return '\n'.join(lines)
+
+    def Save(self, fileName):
+        # one row per name and outcome
+        means, paired = self.Means(), self.PairedHalfWidths()
+        unpaired, ratios = self.UnpairedHalfWidths(), self.SampleRatios()
+        with open(fileName, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['name', 'outcome', 'mean', 'difference', 'pairedHalfWidth', 'unpairedHalfWidth',
+                             'sampleRatio'])
+            for n, name in enumerate(self.names):
+                for outcome in range(OutcomeType.lastOutcome):
+                    writer.writerow([name, OutcomeType(outcome).name] + ['{:.10g}'.format(x) for x in (
+                        means[n, outcome], means[n, outcome] - means[self.baseline, outcome],
+                        paired[n, outcome], unpaired[n, outcome], ratios[n, outcome])])
+
+
+def RunComparison(table, names, nSamples, nDays=200, nWorkers=1, seed=None, baseline=0, results=None,
+                  popCache=None):
+    # every named control set or scenario on the same samples: sample k of each runs on stream k of the seed,
+    # on the same population where the structural controls agree, and draws the same keyed uniforms for the
+    # same guys.  the differences then show the effect of the controls with much less of the noise of the samples
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+
+    outcomes = np.zeros((len(names), nSamples, OutcomeType.lastOutcome))
+    for n, name in enumerate(names):
+        scene = table.Scenario(name) if table.IsScenario(name) else None
+        controls = None if scene else table.Controls(name)
+        if nWorkers == 1:
+            stats = RunSamples(controls, scene, nSamples, nDays, seed, popCache=popCache, results=results,
+                               paired=True)
+        else:
+            stats = RunEnsemble(controls, scene, nSamples, nDays, nWorkers, seed, popCache=popCache,
+                                results=results, paired=True)
+
+        outcomes[n] = [Outcomes(stats[:, sample]) for sample in range(nSamples)]
+
+    return ComparisonType(names, outcomes, baseline)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare control sets of the SIR model on the same samples')
+    parser.add_argument('controls', help="a controls csv, as written by 'Save Controls'")
+    parser.add_argument('names', nargs='+', help='control columns or Scenario columns to compare')
+    parser.add_argument('-b', '--baseline', default=None,
+                        help='the name the others are compared with (default: the first)')
+    parser.add_argument('-n', '--samples', type=int, default=10, help='samples of each name')
+    parser.add_argument('-d', '--days', type=int, default=200, help='last day of each sample')
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help='worker processes for the samples, 0 for one per core')
+    parser.add_argument('-s', '--seed', type=int, default=None, help='root seed: sample k runs on stream k of it')
+    parser.add_argument('-c', '--cache', default='ResultCache', metavar='FOLDER',
+                        help="finished samples are kept in FOLDER and not run again: '' to run every sample")
+    parser.add_argument('-o', '--out', default=None, help='a csv for the comparison')
+    args = parser.parse_args(argv)
+    if args.days > SirModel.lastDay:
+        parser.error('--days goes up to {}'.format(SirModel.lastDay))
+
+    if args.baseline is not None and args.baseline not in args.names:
+        parser.error('the baseline must be one of the names')
+
+    table = ControlsTable.Load(args.controls)
+    seed = args.seed if args.seed is not None else np.random.SeedSequence().entropy
+    print('seed:', seed)
+    results = ResultCacheType(args.cache) if args.cache else None
+    baseline = args.names.index(args.baseline) if args.baseline is not None else 0
+
+    start = time.time()
+    comparison = RunComparison(table, args.names, args.samples, args.days, args.workers or None, seed, baseline,
+                               results)
+    print(comparison.Report())
+    print('{:.1f} s'.format(time.time() - start))
+    if args.out:
+        comparison.Save(args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import numpy as np
+
+
+class ContactLogType:  # (source, contact, day) for every guy a watch wearer infected, until the contact is warned
+    def __init__(self, capacity=1024):
+        self.source = np.zeros(capacity, dtype=np.int32)
+        self.contact = np.zeros(capacity, dtype=np.int32)
+        self.day = np.zeros(capacity, dtype=np.int16)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def Append(self, sources, contacts, day):
+        n = len(contacts)
+        if self.size + n > len(self.source):
+            capacity = max(2 * len(self.source), self.size + n)
+            for name in ('source', 'contact', 'day'):
+                grown = np.zeros(capacity, dtype=getattr(self, name).dtype)
+                grown[:self.size] = getattr(self, name)[:self.size]
+                setattr(self, name, grown)
+
+        self.source[self.size:self.size + n] = sources
+        self.contact[self.size:self.size + n] = contacts
+        self.day[self.size:self.size + n] = day
+        self.size += n
+
+    def Notify(self, sources):
+        # warn the contacts of the sources: returns each contact once with the number of warnings it gets.
+        # the warned entries leave the log
+        warned = np.isin(self.source[:self.size], sources)
+        contacts, nWarnings = np.unique(self.contact[:self.size][warned], return_counts=True)
+
+        kept = np.flatnonzero(~warned)
+        for column in (self.source, self.contact, self.day):
+            column[:kept.size] = column[kept]
+        self.size = kept.size
+
+        return contacts.astype(np.int64), nWarnings
+
+    def Clear(self):
+        self.size = 0
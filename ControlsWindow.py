@@ -1,24 +1,19 @@
-from enum import IntEnum
-
 from PyQt5 import QtWidgets, QtCore, QtGui
 from PyQt5.QtWidgets import QAbstractItemView, QMessageBox
 
 from FileIO import SaveAsCsv, loadCsv
+from Scenario import ScenarioControlsType
 from SirModel import Ctrls, GetValue
 
-class ScenarioControlsType:
-    def __init__(self):
-        self.Controls = []
-        self.ControlsName = ''
-        self.column = 0
-        self.nDays = 0
 
-class SceneStatus(IntEnum):
-    none,\
-    run,\
-    end = range(3)
+def EditsToControls(edits, controls):
+    # copy the text of the line edits into the model's controls
+    for n, edit in enumerate(edits):
+        controls.SetText(n, edit.text())
+
 
 class ControlsWindow(QtWidgets.QMainWindow):
+    sceneChanged = QtCore.pyqtSignal()  # a scenario was loaded, or plain controls applied
 
     def __init__(self, controls, SirModel, *args, **kwargs):
         super(ControlsWindow, self).__init__(*args, **kwargs)
@@ -28,8 +23,6 @@ class ControlsWindow(QtWidgets.QMainWindow):
         self.SirModel = SirModel
 
         self.Scenario = None  # type: list[ScenarioControlsType]
-        self.sceneStatus = SceneStatus.none
-        self.SceneDays = 0
         self.nthCtrls = 0
 
         self.centralwidget = QtWidgets.QWidget(self)
@@ -143,31 +136,20 @@ class ControlsWindow(QtWidgets.QMainWindow):
 
         self.Scenario = Scene
         self.FirstDay()
+        self.sceneChanged.emit()
 
     def CopySceneControls(self):
         for row in range(int(Ctrls.LastCtrl)):
             text = self.Scenario[self.nthCtrls].Controls[row]
             self.controls[row].setText(text)
 
-        self.SirModel.SetCntrls()
-
-    def NextDay(self):
-        self.SceneDays += 1
-        if GetValue(self.Scenario[self.nthCtrls].nDays) < self.SceneDays:
-            self.nthCtrls += 1
-            if self.nthCtrls >= len(self.Scenario):
-                self.sceneStatus = SceneStatus.end
-                self.nthCtrls = 0
-                return
-
-            self.SceneDays = 0
-            self.CopySceneControls()
+        with self.SirModel.lock:
+            EditsToControls(self.controls, self.SirModel.Controls)
+            self.SirModel.SetCntrls()
 
     def FirstDay(self):
-        self.SceneDays = 0
+        # the runner steps through the scenario with its own SceneTimeline: the window shows its first controls
         self.nthCtrls = 0
-        self.sceneStatus = SceneStatus.run
-
         self.CopySceneControls()
 
     def ApplySelected(self):
@@ -191,9 +173,12 @@ class ControlsWindow(QtWidgets.QMainWindow):
                 continue
             self.controls[row - 1].setText(item.text())
 
-        self.SirModel.ResetStats = True
-        self.SirModel.SetCntrls()
+        with self.SirModel.lock:
+            self.SirModel.ResetStats = True
+            EditsToControls(self.controls, self.SirModel.Controls)
+            self.SirModel.SetCntrls()
         # self.SirModel.ctrlsChanged = True
+        self.sceneChanged.emit()
 
     def SaveControls(self):
         SaveAsCsv('Sir Controls.csv', self.DefaultTable)
@@ -0,0 +1,248 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from enum import IntEnum
+from statistics import NormalDist
+
+import numpy as np
+
+from EnsembleStats import PadDays
+from PopulationCache import SharedCache, WorkerShare
+from ResultCache import ResultKey
+from Scenario import SceneTimeline, SceneStatus
+from SirModel import SirModel, StatType
+
+
+class OutcomeType(IntEnum):  # what a sample came to, from its StatType x day stats
+    [totalInfected,    # everyone ever infected, the first guys too
+     peakNewInfected,  # the most new infections in a day
+     peakDay,          # the day of peakNewInfected
+     peakNonIsolated,  # the most infected guys not isolated on a day
+     isolated,         # isolations, by symptoms and by watch
+     removed,          # recovered or dead
+     dead,
+     lastOutcome] = range(8)
+
+
+def Outcomes(stats):
+    # stats: StatType x day. returns one value for each OutcomeType
+    outcomes = np.zeros(OutcomeType.lastOutcome)
+    outcomes[OutcomeType.totalInfected] = stats[StatType.infected].sum()
+    newInfected = stats[StatType.infected, 1:]  # day 0 holds the first guys
+    if newInfected.size:
+        outcomes[OutcomeType.peakNewInfected] = newInfected.max()
+        outcomes[OutcomeType.peakDay] = newInfected.argmax() + 1
+    outcomes[OutcomeType.peakNonIsolated] = stats[StatType.nonIsolated].max()
+    outcomes[OutcomeType.isolated] = stats[StatType.isoBySymptom].sum() + stats[StatType.isoByWatch].sum()
+    outcomes[OutcomeType.removed] = stats[StatType.removed].sum()
+    outcomes[OutcomeType.dead] = stats[StatType.dead].sum()
+    return outcomes
+
+
+class StopRuleType:  # when an adaptive ensemble has run enough samples
+    def __init__(self, tolerance=0.05, outcomes=(OutcomeType.peakNewInfected, OutcomeType.dead, OutcomeType.isolated),
+                 confidence=0.95, minSamples=5, maxSamples=200):
+        self.tolerance = tolerance  # the most the confidence interval may reach either side of the mean, as a fraction of it
+        self.outcomes = [OutcomeType(outcome) for outcome in outcomes]
+        self.confidence = confidence
+        self.minSamples = minSamples  # the interval of fewer samples is not to be trusted
+        self.maxSamples = maxSamples  # stop here anyway
+        self.z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+    def HalfWidths(self, outcomes):
+        # outcomes: sample x OutcomeType. the half width of the confidence interval of each mean in self.outcomes
+        values = outcomes[:, self.outcomes]
+        if len(values) < 2:
+            return np.full(len(self.outcomes), np.inf)
+
+        return self.z * values.std(axis=0, ddof=1) / np.sqrt(len(values))
+
+    def Done(self, outcomes):
+        # every interval within tolerance of its mean: a mean of 0 counts as 1, or it could never be met
+        if len(outcomes) >= self.maxSamples:
+            return True
+
+        if len(outcomes) < self.minSamples:
+            return False
+
+        means = np.maximum(np.abs(outcomes[:, self.outcomes].mean(axis=0)), 1)
+        return bool(np.all(self.HalfWidths(outcomes) <= self.tolerance * means))
+
+
+def RunSample(model, timeline=None, nDays=200):
+    # run a freshly reset model day by day, as MainWindow.Run does, without drawing anything
+    # returns the RunStats of the sample: StatType x day
+    day = 0
+    while day < nDays:
+        if timeline:
+            controls = timeline.NextDay()
+            if timeline.sceneStatus == SceneStatus.end:
+                break
+
+            if controls:
+                model.Controls = controls
+                model.SetCntrls()
+
+        model.DayStats(day)
+        if model.NumInfected() == 0:
+            break
+
+        day += 1
+        model.NextDay(day)
+
+    return PadDays(model.RunStats[:, :day + 1], nDays + 1)
+
+
+def RunSamples(controls, scene, nSamples, nDays=200, seed=None, folder=None, popCache=None, results=None,
+               paired=False):
+    # nSamples one after the other in this process: StatType x sample x day
+    # sample k runs on random stream k of the seed, the same as in RunEnsemble
+    # folder: keep the populations in np.memmap files there. popCache: a folder for the built populations
+    # results: a ResultCacheType: samples in it are not run again, and the ones run go into it
+    # paired: the samples draw SirModel's keyed uniforms, for a paired comparison with other controls
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+
+    timeline = SceneTimeline(scene) if scene else None
+    if timeline:
+        controls = timeline.FirstDay()
+
+    stats = np.zeros((StatType.lastRunStat, nSamples, nDays + 1))
+    model = SirModel(controls, seed, reset=False, folder=folder)
+    model.populations = SharedCache(popCache)
+    model.paired = paired
+    for sample in range(nSamples):
+        key = ResultKey(controls, scene, seed, sample, nDays, paired) if results else None
+        sampleStats = results.Get(key) if results else None
+        if sampleStats is None:
+            if timeline:
+                model.Controls = timeline.FirstDay()
+
+            model.ResetStats = True
+            model.Reset(sample)
+            sampleStats = RunSample(model, timeline, nDays)
+            if results:
+                results.Put(key, sampleStats)
+
+        stats[:, sample, :] = sampleStats
+
+    model.store.Release()
+    return stats
+
+
+def RunOneSample(task):
+    # a worker process: one sample on its own random stream
+    controls, scene, nDays, seed, stream, folder, popCache, paired = task
+
+    timeline = SceneTimeline(scene) if scene else None
+    if timeline:
+        controls = timeline.FirstDay()
+
+    model = SirModel(controls, seed, reset=False, folder=folder)
+    model.populations = SharedCache(popCache)
+    model.paired = paired
+    model.Reset(stream)
+    stats = RunSample(model, timeline, nDays)
+    model.store.Release()
+    return stats
+
+
+def EnsembleSamples(controls, scene, nSamples, nDays=200, nWorkers=None, seed=None, firstStream=0, folder=None,
+                    popCache=None, results=None, paired=False):
+    # nSamples spread over a pool of worker processes: yields the StatType x day stats of each, in order
+    # sample k runs on random stream firstStream + k of the seed, so any sample can be replayed alone
+    # folder: each worker keeps its population in np.memmap files there. popCache: a folder the workers share
+    # the populations they build through. results: a ResultCacheType: only the samples not in it are run.
+    # paired: as for RunSamples
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+
+    streams = range(firstStream, firstStream + nSamples)
+    keys = {stream: ResultKey(controls, scene, seed, stream, nDays, paired) for stream in streams} if results else {}
+    cached = {stream: results.Get(key) for stream, key in keys.items()}
+    tasks = [(controls, scene, nDays, seed, stream, folder, popCache, paired) for stream in streams
+             if cached.get(stream) is None]
+    if not tasks:
+        yield from (cached[stream] for stream in streams)
+        return
+
+    nWorkers = min(nWorkers or os.cpu_count(), len(tasks))
+    with ProcessPoolExecutor(max_workers=nWorkers, initializer=WorkerShare, initargs=(nWorkers,)) as pool:
+        ran = pool.map(RunOneSample, tasks)
+        try:
+            for stream in streams:
+                if cached.get(stream) is not None:
+                    yield cached[stream]
+                    continue
+
+                sampleStats = next(ran)
+                if results:
+                    results.Put(keys[stream], sampleStats)
+                yield sampleStats
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)  # closed early: the samples not started yet are dropped
+
+
+def AdaptiveSamples(controls, scene, rule, nDays=200, nWorkers=None, seed=None, firstStream=0, folder=None,
+                    popCache=None, results=None):
+    # yields the StatType x day stats of samples on streams firstStream, firstStream + 1, ... until rule is met.
+    # nWorkers samples run at once, and the rule looks at them in stream order: where it stops does not depend on
+    # which worker was quickest. the samples still running then are thrown away
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+
+    nWorkers = nWorkers or os.cpu_count()
+    outcomes = []
+    pending = deque()  # (key, stats or their future), in stream order
+    nextStream = firstStream
+    with ProcessPoolExecutor(max_workers=nWorkers, initializer=WorkerShare, initargs=(nWorkers,)) as pool:
+        while True:
+            while len(pending) < nWorkers and nextStream < firstStream + rule.maxSamples:
+                key = ResultKey(controls, scene, seed, nextStream, nDays) if results else None
+                stats = results.Get(key) if results else None
+                if stats is None:
+                    task = (controls, scene, nDays, seed, nextStream, folder, popCache, False)
+                    stats = pool.submit(RunOneSample, task)
+                pending.append((key, stats))
+                nextStream += 1
+
+            key, stats = pending.popleft()
+            if not isinstance(stats, np.ndarray):
+                stats = stats.result()
+                if results:
+                    results.Put(key, stats)
+
+            yield stats
+            outcomes.append(Outcomes(stats))
+            if rule.Done(np.array(outcomes)):
+                pool.shutdown(wait=False, cancel_futures=True)
+                return
+
+
+def RunAdaptive(controls, scene, rule, nDays=200, nWorkers=None, seed=None, folder=None, popCache=None,
+                results=None):
+    # all the samples of AdaptiveSamples: StatType x sample x day, with as many samples as the rule took
+    samples = AdaptiveSamples(controls, scene, rule, nDays, nWorkers, seed, folder=folder, popCache=popCache,
+                              results=results)
+    return np.array(list(samples)).reshape(-1, StatType.lastRunStat, nDays + 1).swapaxes(0, 1)
+
+
+def RunEnsemble(controls, scene, nSamples, nDays=200, nWorkers=None, seed=None, folder=None, popCache=None,
+                results=None, paired=False):
+    # all the samples of EnsembleSamples: StatType x sample x day
+    stats = np.zeros((StatType.lastRunStat, nSamples, nDays + 1))
+    samples = EnsembleSamples(controls, scene, nSamples, nDays, nWorkers, seed, folder=folder, popCache=popCache,
+                              results=results, paired=paired)
+    for sample, sampleStats in enumerate(samples):
+        stats[:, sample, :] = sampleStats
+
+    return stats
+
+
+def MergeRunStats(model, samples):
+    # add the stats of ensemble samples to the model's, as if the samples had run in the GUI
+    # the lock is taken for one sample at a time: the model is free while the next one runs
+    for sampleStats in samples:
+        with model.lock:
+            model.Stats.Add(sampleStats)
+            model.Sample += 1
@@ -0,0 +1,114 @@
+import numpy as np
+
+
+def PadDays(series, nDays):
+    # a stat x day series cut, or padded with 0s, to nDays
+    padded = np.zeros((series.shape[0], nDays))
+    n = min(nDays, series.shape[1])
+    padded[:, :n] = series[:, :n]
+    return padded
+
+
+class EnsembleStatsType:  # running mean, variance and quantiles of each stat on each day, over any number of samples
+    def __init__(self, nStats, reservoirSize=100, seed=0):
+        self.nStats = nStats
+        self.reservoirSize = reservoirSize  # samples kept for the quantiles
+        self.rng = np.random.default_rng(seed)  # picks the samples that are kept
+        self.generation = 0  # goes up on every Add and Clear: a copy of the same generation holds the same stats
+        self.Clear()
+
+    def __len__(self):
+        return self.nSamples
+
+    def Clear(self):
+        self.generation += 1
+        self.nSamples = 0
+        self.nDays = 0
+        self.mean = np.zeros((2, self.nStats, 0))  # [daily, cumulative] x stat x day
+        self.m2 = np.zeros((2, self.nStats, 0))    # sum of the squared differences from the mean
+        self.reservoir = np.zeros((self.reservoirSize, self.nStats, 0))  # daily series of a uniform pick of the samples
+        self.nKept = 0
+
+    def GrowDays(self, nDays):
+        # the samples so far all ended before nDays: they count 0 a day from then on,
+        # so their cumulative counts stay at the totals of their last day
+        if nDays <= self.nDays:
+            return
+
+        pad = ((0, 0), (0, 0), (0, nDays - self.nDays))
+        mean = np.pad(self.mean, pad)
+        m2 = np.pad(self.m2, pad)
+        if self.nDays > 0:
+            mean[1, :, self.nDays:] = self.mean[1, :, -1:]
+            m2[1, :, self.nDays:] = self.m2[1, :, -1:]
+
+        self.mean, self.m2 = mean, m2
+        self.reservoir = np.pad(self.reservoir, pad)
+        self.nDays = nDays
+
+    def Add(self, series):
+        # a finished sample: stat x day, from day 0 to the last day it ran
+        series = np.asarray(series, dtype=float)
+        self.generation += 1
+        self.GrowDays(series.shape[1])
+        daily = PadDays(series, self.nDays)
+        x = np.stack((daily, np.cumsum(daily, axis=1)))
+
+        # Welford: one pass over the days, nothing kept per sample
+        self.nSamples += 1
+        delta = x - self.mean
+        self.mean += delta / self.nSamples
+        self.m2 += delta * (x - self.mean)
+
+        # reservoir sampling: every sample so far has the same chance to be kept
+        if self.nKept < self.reservoirSize:
+            self.reservoir[self.nKept] = daily
+            self.nKept += 1
+        else:
+            slot = self.rng.integers(self.nSamples)
+            if slot < self.reservoirSize:
+                self.reservoir[slot] = daily
+
+    def Days(self, acc, nDays, cumulative):
+        # stat x nDays of a [daily, cumulative] accumulator
+        days = np.zeros((self.nStats, nDays))
+        n = min(nDays, self.nDays)
+        days[:, :n] = acc[int(cumulative), :, :n]
+        if cumulative and 0 < self.nDays < nDays:
+            days[:, n:] = acc[1, :, -1:]
+
+        return days
+
+    def Mean(self, nDays, cumulative=False, current=None):
+        # current: the stats of a sample still running, counted as if it had finished
+        mean = self.Days(self.mean, nDays, cumulative)
+        if current is None:
+            return mean
+
+        x = PadDays(np.asarray(current, dtype=float), nDays)
+        if cumulative:
+            x = np.cumsum(x, axis=1)
+
+        return (self.nSamples * mean + x) / (self.nSamples + 1)
+
+    def Var(self, nDays, cumulative=False):
+        if self.nSamples < 2:
+            return np.zeros((self.nStats, nDays))
+
+        return self.Days(self.m2, nDays, cumulative) / (self.nSamples - 1)
+
+    def StdErr(self, nDays, cumulative=False):
+        # of the mean
+        return np.sqrt(self.Var(nDays, cumulative) / max(self.nSamples, 1))
+
+    def Quantile(self, q, nDays, cumulative=False):
+        # q x stat x day, or stat x day for a single q: estimated from the samples kept
+        if self.nKept == 0:
+            return np.zeros(np.shape(q) + (self.nStats, nDays))
+
+        kept = self.reservoir[:self.nKept]
+        kept = np.stack([PadDays(sample, nDays) for sample in kept])
+        if cumulative:
+            kept = np.cumsum(kept, axis=2)
+
+        return np.quantile(kept, q, axis=0)
@@ -0,0 +1,42 @@
+from enum import IntEnum
+
+import numpy as np
+
+
+class EventType(IntEnum):  # what happens to a guy on the day of the event
+    [symptoms,   # shows symptoms: can be tested
+     recover,
+     die,
+     isolate,
+     lastEvent] = range(5)
+
+
+class EventCalendarType:  # the guys due for each event, bucketed by day
+    def __init__(self):
+        self.buckets = {}  # (day, EventType) -> list of arrays of guys
+
+    def Schedule(self, days, event, ids):
+        # days is one day for all the ids, or a day per id
+        ids = np.asarray(ids, dtype=np.int64)
+        if ids.size == 0:
+            return
+
+        if np.ndim(days) == 0:
+            self.buckets.setdefault((int(days), event), []).append(ids)
+            return
+
+        order = np.argsort(days, kind='stable')
+        days, ids = np.asarray(days)[order], ids[order]
+        firsts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        for first, last in zip(firsts, np.r_[firsts[1:], days.size]):
+            self.buckets.setdefault((int(days[first]), event), []).append(ids[first:last])
+
+    def Pop(self, day, event):
+        bucket = self.buckets.pop((day, event), None)
+        if bucket is None:
+            return np.zeros(0, dtype=np.int64)
+
+        return np.concatenate(bucket)
+
+    def Clear(self):
+        self.buckets.clear()
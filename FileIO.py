@@ -3,9 +3,6 @@ import os
 from os import path
 from pathlib import Path
 
-from PyQt5 import QtWidgets
-from PyQt5.QtWidgets import QMessageBox
-
 def GetFilename(fileName):
     # do not over write the input file
     if not path.exists(fileName):
@@ -45,7 +42,18 @@ def SaveAsCsv(fileName, table):
 
             writer.writerow(line)
 
+def ReadCsv(fileName):
+    list1 = []
+    with open(fileName, "r") as fileInput:
+        for row in csv.reader(fileInput):
+            list1.append(row)
+
+    return list1
+
+
 def loadCsv():
+    from PyQt5 import QtWidgets
+
     fileExtension = 'csv'
     path = os.path.normpath(os.getcwd())
     fileName, _ = QtWidgets.QFileDialog.getOpenFileName(None, "Open " + fileExtension, path,
@@ -54,9 +62,4 @@ def loadCsv():
     if not fileName:
         return None
 
-    list1 = []
-    with open(fileName, "r") as fileInput:
-        for row in csv.reader(fileInput):
-            list1.append(row)
-
-    return list1
+    return ReadCsv(fileName)
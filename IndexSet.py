@@ -0,0 +1,51 @@
+import numpy as np
+
+from ArrayStore import ArrayStoreType
+
+
+class IndexSetType:  # a set of guys: add, remove and list in time proportional to the guys involved, not nPeeps
+    def __init__(self, nPeeps, store=None, name='set'):
+        store = store or ArrayStoreType()
+        self.members = store.Zeros(name + '.members', nPeeps, np.int32)  # the first size entries are the set, in no order
+        self.where = store.Full(name + '.where', nPeeps, -1, np.int32)   # where each guy is in members, -1 if not in the set
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def Items(self):
+        # a view: copy it before changing the set
+        return self.members[:self.size]
+
+    def Contains(self, ids):
+        return self.where[ids] >= 0
+
+    def Add(self, ids):
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        ids = ids[self.where[ids] < 0]
+        end = self.size + ids.size
+        self.members[self.size:end] = ids
+        self.where[ids] = np.arange(self.size, end)
+        self.size = end
+
+    def Remove(self, ids):
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        ids = ids[self.where[ids] >= 0]
+        if ids.size == 0:
+            return
+
+        # fill the holes left below the new end with the survivors above it
+        newSize = self.size - ids.size
+        holes = self.where[ids]
+        self.where[ids] = -1
+        holes = holes[holes < newSize]
+
+        tail = self.members[newSize:self.size]
+        movers = tail[self.where[tail] >= 0]
+        self.members[holes] = movers
+        self.where[movers] = holes
+        self.size = newSize
+
+    def Clear(self):
+        self.where[self.Items()] = -1
+        self.size = 0
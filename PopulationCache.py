@@ -0,0 +1,99 @@
+import os
+from collections import OrderedDict
+
+from Checkpoint import WriteArrays, ReadArrays
+
+
+class PopulationCacheType:  # built populations by SirModel.StructureKey: the latest used in memory, all of them in folder
+    def __init__(self, maxBytes=1 << 30, folder=None):
+        self.maxBytes = maxBytes  # the populations in memory are dropped, least recently used first, above this
+        self.folder = folder
+        self.entries = OrderedDict()  # key -> the arrays of SirModel.BuildStructure, least recently used first
+        self.nBytes = 0
+        self.hits = 0
+        self.misses = 0
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def FileName(self, key):
+        return os.path.join(self.folder, key + '.sirpop') if self.folder else None
+
+    def Get(self, key):
+        # the arrays are shared by every model that gets them: they must not be changed
+        structure = self.entries.get(key)
+        if structure is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return structure
+
+        fileName = self.FileName(key)
+        if fileName and os.path.exists(fileName):
+            header, structure = ReadArrays(fileName)
+            self.Keep(key, structure)
+            self.hits += 1
+            return structure
+
+        self.misses += 1
+        return None
+
+    def Put(self, key, structure, keep=True):
+        # written under another name first: another process may be reading or writing the same population
+        # keep=False: the arrays only go to the folder. for arrays mapped from files that are deleted when the
+        # model moves on, which holding on to them would keep on the disk
+        fileName = self.FileName(key)
+        if fileName and not os.path.exists(fileName):
+            tempName = '{}.{}.tmp'.format(fileName, os.getpid())
+            WriteArrays(tempName, {'key': key}, structure)
+            os.replace(tempName, fileName)
+
+        if keep:
+            self.Keep(key, structure)
+
+    def Keep(self, key, structure):
+        for array in structure.values():
+            array.flags.writeable = False
+
+        if key in self.entries:
+            self.nBytes -= sum(array.nbytes for array in self.entries.pop(key).values())
+        self.entries[key] = structure
+        self.nBytes += sum(array.nbytes for array in structure.values())
+
+        # the newest one stays, however big
+        while self.nBytes > self.maxBytes and len(self.entries) > 1:
+            _, dropped = self.entries.popitem(last=False)
+            self.nBytes -= sum(array.nbytes for array in dropped.values())
+
+    def Clear(self):
+        # the memory tier only: the files stay for other runs
+        self.entries.clear()
+        self.nBytes = 0
+
+
+caches = {}  # folder -> the PopulationCacheType of this process
+sharedBytes = 1 << 30  # the memory tier of each of them: a pool worker gets its share of the RAM, see WorkerShare
+
+
+def PhysicalBytes():
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):  # not on every platform
+        return None
+
+
+def WorkerShare(nWorkers):
+    # the initializer of a pool worker: the memory tiers of all nWorkers together take a quarter of the RAM at most.
+    # most of what a worker builds is the population of a stream it will not run again
+    global sharedBytes
+    ram = PhysicalBytes()
+    sharedBytes = min(sharedBytes, ram // 4) // nWorkers if ram else sharedBytes // nWorkers
+
+
+def SharedCache(folder=None):
+    # one cache per process and folder: the samples a worker process runs share it
+    if folder not in caches:
+        caches[folder] = PopulationCacheType(sharedBytes, folder)
+
+    return caches[folder]
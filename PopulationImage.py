@@ -0,0 +1,115 @@
+from enum import IntEnum
+
+import numpy as np
+
+from SirModel import Cols, StatusType
+
+
+class PixelType(IntEnum):  # the colour of a guy in the population image: later ones are drawn over earlier ones
+    [nobody,           # susceptible, not a service guy: the background
+     serviceSuscept,
+     infected,
+     recovered,
+     dead,
+     isolated,         # infected and isolated
+     hasWatch,
+     lastPixel] = range(8)
+
+
+# the rgb of each PixelType: w, b, r, g, k, y and m as matplotlib draws them
+PixelRgb = np.array([[255, 255, 255], [0, 0, 255], [255, 0, 0], [0, 128, 0], [0, 0, 0], [191, 191, 0], [191, 0, 191]],
+                    dtype=np.uint8)
+
+
+class PopulationImageType:  # the grid of guys as one rgb image, updated where it changed
+    maxCols = 1100  # pixels across: bigger grids are binned
+    maxRows = 1100
+
+    def __init__(self):
+        self.data = None  # the population the image is of
+        self.image = np.full((1, 1, 3), 255, dtype=np.uint8)
+
+    def Pixels(self, model, ids):
+        # the PixelType of each guy
+        data = model.data
+        status = data[ids, Cols.status]
+        pixels = np.zeros(len(ids), dtype=np.uint8)
+        pixels[(status == StatusType.nonInfected) & (data[ids, Cols.serviceGuy] == 1)] = PixelType.serviceSuscept
+        pixels[status == StatusType.infected] = PixelType.infected
+        pixels[status == StatusType.recovered] = PixelType.recovered
+        pixels[status == StatusType.dead] = PixelType.dead
+        pixels[(status == StatusType.infected) & model.isolated.Contains(ids)] = PixelType.isolated
+        pixels[data[ids, Cols.hasWatch] == 1] = PixelType.hasWatch
+        return pixels
+
+    def Bins(self, ids):
+        # the pixel of each guy
+        x = ids % self.gridCols // self.binSize
+        y = ids // self.gridCols // self.binSize
+        return y * self.image.shape[1] + x
+
+    def BinColors(self, counts):
+        # the colours of the guys in each bin mixed by their counts, background included: a bin looks as much
+        # of a colour as its guys are. bins past the last guy are background
+        total = counts.sum(axis=1, keepdims=True)
+        rgb = (counts @ PixelRgb.astype(np.int64) + total // 2) // np.maximum(total, 1)
+        rgb[total[:, 0] == 0] = PixelRgb[PixelType.nobody]
+        return rgb.astype(np.uint8)
+
+    def Build(self, model):
+        # a new population: every guy once
+        self.data = model.data
+        self.gridCols = model.data.gridCols
+        nPeeps = model.data.nPeeps
+        gridRows = -(-nPeeps // self.gridCols)
+        self.binSize = max(1, -(-self.gridCols // self.maxCols), -(-gridRows // self.maxRows))
+
+        everyone = np.arange(nPeeps)
+        self.pixels = self.Pixels(model, everyone)
+        self.lastInfected = model.infected.Items().copy()
+        self.nRecovered = len(model.recovered)
+        self.nDead = len(model.dead)
+
+        if self.binSize == 1:
+            self.image = np.full((gridRows, self.gridCols, 3), 255, dtype=np.uint8)
+            self.image.reshape(-1, 3)[:nPeeps] = PixelRgb[self.pixels]
+            return
+
+        self.image = np.zeros((-(-gridRows // self.binSize), -(-self.gridCols // self.binSize), 3), dtype=np.uint8)
+        nBins = self.image.shape[0] * self.image.shape[1]
+        bins = self.Bins(everyone)
+        self.counts = np.bincount(bins * PixelType.lastPixel + self.pixels, minlength=nBins * PixelType.lastPixel)
+        self.counts = self.counts.reshape(nBins, PixelType.lastPixel)
+        self.image.reshape(-1, 3)[:] = self.BinColors(self.counts)
+
+    def Update(self, model):
+        # only guys that were or are infected since the last update can have changed colour:
+        # the recovered and dead sets only grow, so their new guys are at the end
+        if model.data is not self.data:
+            self.Build(model)
+            return self.image
+
+        infected = model.infected.Items()
+        ids = np.unique(np.concatenate((infected,
+                                        self.lastInfected,
+                                        model.recovered.Items()[self.nRecovered:],
+                                        model.dead.Items()[self.nDead:])).astype(np.int64))
+        self.lastInfected = infected.copy()
+        self.nRecovered = len(model.recovered)
+        self.nDead = len(model.dead)
+
+        new = self.Pixels(model, ids)
+        changed = new != self.pixels[ids]
+        ids, old, new = ids[changed], self.pixels[ids[changed]], new[changed]
+        self.pixels[ids] = new
+
+        if self.binSize == 1:
+            self.image.reshape(-1, 3)[ids] = PixelRgb[new]
+            return self.image
+
+        bins = self.Bins(ids)
+        np.subtract.at(self.counts, (bins, old), 1)
+        np.add.at(self.counts, (bins, new), 1)
+        touched = np.unique(bins)
+        self.image.reshape(-1, 3)[touched] = self.BinColors(self.counts[touched])
+        return self.image
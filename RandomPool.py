@@ -0,0 +1,82 @@
+import math
+
+import numpy as np
+
+
+def Mix(x):
+    # splitmix64's finaliser: every bit of x changes about half the bits of the result. the products wrap
+    with np.errstate(over='ignore'):
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+        return x ^ (x >> np.uint64(31))
+
+
+class RandomPoolType:  # uniforms drawn from the Generator in big blocks and handed out in slices
+    minBlock = 65536
+
+    def __init__(self, rng, keySeed=0):
+        self.rng = rng  # type: np.random.Generator
+        self.keySeed = keySeed  # the root of the Keyed uniforms
+        self.block = np.zeros(0)
+        self.next = 0
+        self.usedToday = 0
+        self.usedYesterday = 0
+        self.poissonCdfs = {}  # lambda -> cdf table
+
+    def Reserve(self, n):
+        # make sure n uniforms are ready, with one call to the Generator at most
+        left = self.block.size - self.next
+        if left >= n:
+            return
+
+        size = max(self.minBlock, n - left, 2 * self.usedYesterday)
+        self.block = np.concatenate((self.block[self.next:], self.rng.random(size)))
+        self.next = 0
+
+    def StartDay(self):
+        # draw what yesterday used in one go
+        self.usedYesterday = self.usedToday
+        self.usedToday = 0
+        self.Reserve(self.usedYesterday)
+
+    def Uniform(self, n):
+        n = int(n)
+        self.Reserve(n)
+        u = self.block[self.next:self.next + n]
+        self.next += n
+        self.usedToday += n
+        return u
+
+    def Keyed(self, purpose, *keys):
+        # one uniform per entry of the keys, which broadcast together: the same keySeed, purpose and keys
+        # always give the same uniform, whatever was drawn before.  they come from a hash, not from rng
+        mixed = np.full(np.broadcast(*keys).shape, Mix(np.uint64(self.keySeed) ^ np.uint64(purpose)), dtype=np.uint64)
+        for key in keys:
+            mixed = Mix(mixed ^ np.asarray(key).astype(np.uint64))
+
+        return (mixed >> np.uint64(11)) * (1.0 / (1 << 53))
+
+    def Permutation(self, ids, u=None):
+        # u: the uniforms to sort by, one per id: drawn if None
+        ids = np.asarray(ids)
+        return ids[np.argsort(self.Uniform(ids.size) if u is None else u)]
+
+    def Poisson(self, lam, n, u=None):
+        # inverse cdf: lam is a small number of contacts a day
+        cdf = self.poissonCdfs.get(lam)
+        if cdf is None:
+            kMax = int(lam + 12 * math.sqrt(lam) + 12)
+            k = np.arange(kMax + 1)
+            logPmf = k * math.log(lam) - lam - np.cumsum(np.log(np.maximum(k, 1))) if lam > 0 else np.where(k == 0, 0.0, -np.inf)
+            cdf = np.cumsum(np.exp(logPmf))
+            self.poissonCdfs[lam] = cdf
+
+        return np.searchsorted(cdf, self.Uniform(n) if u is None else u, side='right')
+
+    def Geometric(self, p, n, u=None):
+        # the number of days until the first success, p a day
+        u = self.Uniform(n) if u is None else u
+        if p >= 1:
+            return np.ones(int(n), dtype=np.int64)
+
+        return 1 + np.floor(np.log1p(-u) / math.log1p(-p)).astype(np.int64)
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from Scenario import TextsToControls
+from SirModel import GetValue
+
+resultVersion = 3  # goes up when the model changes what a sample does: older results no longer match
+
+
+def ResultKey(controls, scene, seed, stream, nDays, paired=False):
+    # the same controls, or scenario, seed, stream and days always give the same sample
+    # the controls go in as numbers, so '0.10' and '0.1' in a csv are the same
+    if scene:
+        what = [[[float(x) for x in TextsToControls(scnCtrls.Controls)], GetValue(scnCtrls.nDays)] for scnCtrls in scene]
+    else:
+        what = [float(x) for x in controls]
+
+    text = json.dumps([resultVersion, what, str(seed), stream, nDays] + (['paired'] if paired else []))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ResultCacheType:  # the StatType x day stats of finished samples, one .npy file each: least recently used go first
+    def __init__(self, folder='ResultCache', maxBytes=1 << 28):
+        self.folder = folder
+        self.maxBytes = maxBytes
+        self.nBytes = None  # the size of the files: worked out on the first Put
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(folder, exist_ok=True)
+
+    def FileName(self, key):
+        return os.path.join(self.folder, key + '.npy')
+
+    def Seed(self):
+        # a root seed kept in the folder: runs of later sessions on it ask for the same samples, and find them
+        try:
+            with open(os.path.join(self.folder, 'seed.txt')) as file:
+                return int(file.read())
+        except (OSError, ValueError):
+            return self.NewSeed()
+
+    def NewSeed(self):
+        # a fresh root seed in place of the kept one: the samples of the old one stay until they are trimmed
+        seed = np.random.SeedSequence().entropy
+        with open(os.path.join(self.folder, 'seed.txt'), 'w') as file:
+            file.write(str(seed))
+        return seed
+
+    def Get(self, key):
+        fileName = self.FileName(key)
+        try:
+            stats = np.load(fileName)
+            os.utime(fileName)  # just used
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return stats
+
+    def Put(self, key, stats):
+        # written under another name first: another process may be writing the same sample
+        fileName = self.FileName(key)
+        tempName = '{}.{}.tmp'.format(fileName, os.getpid())
+        with open(tempName, 'wb') as file:
+            np.save(file, stats)
+        os.replace(tempName, fileName)
+
+        if self.nBytes is None:
+            self.nBytes = sum(size for _, size, _ in self.Files())
+        else:
+            self.nBytes += os.path.getsize(fileName)
+
+        if self.nBytes > self.maxBytes:
+            self.Trim()
+
+    def Files(self):
+        # (last used, size, file name) of every result
+        files = []
+        for entry in os.scandir(self.folder):
+            if entry.name.endswith('.npy'):
+                info = entry.stat()
+                files.append((info.st_mtime, info.st_size, entry.path))
+
+        return files
+
+    def Trim(self):
+        # down to 3/4 of maxBytes, so the next few Puts do not trim again
+        files = sorted(self.Files())
+        self.nBytes = sum(size for _, size, _ in files)
+        for _, size, fileName in files:
+            if self.nBytes <= self.maxBytes * 3 // 4:
+                break
+
+            try:
+                os.remove(fileName)
+                self.nBytes -= size
+            except OSError:
+                pass
@@ -0,0 +1,112 @@
+from enum import IntEnum
+
+from FileIO import ReadCsv
+from SirModel import Ctrls, ControlsType, GetValue
+
+
+def TextsToControls(texts):
+    # controls missing from the table, as in older csv files, keep their defaults
+    controls = ControlsType()
+    for n, text in enumerate(texts):
+        if text != '':
+            controls.SetText(n, text)
+
+    return controls
+
+
+class ScenarioControlsType:
+    def __init__(self):
+        self.Controls = []
+        self.ControlsName = ''
+        self.column = 0
+        self.nDays = 0
+
+
+class SceneStatus(IntEnum):
+    none,\
+    run,\
+    end = range(3)
+
+
+class ControlsTable:  # the csv that ControlsWindow.SaveControls writes: one column per set of controls
+    def __init__(self, rows):
+        self.rows = rows  # type: list[list[str]]
+
+    @classmethod
+    def Load(cls, fileName):
+        return cls(ReadCsv(fileName))
+
+    def Item(self, row, col):
+        if row >= len(self.rows) or col >= len(self.rows[row]):
+            return ''
+
+        return self.rows[row][col].strip()
+
+    def Names(self):
+        # the names of the control sets and scenarios, from the top row
+        return [name for name in self.rows[0][1:] if name.strip() != ''] if self.rows else []
+
+    def Column(self, name):
+        for col in range(1, len(self.rows[0])):
+            if self.Item(0, col) == name:
+                return col
+
+        raise KeyError("There is no control list named: '" + name + "'")
+
+    @staticmethod
+    def IsScenario(name):
+        return name.startswith('Scenario')
+
+    def Controls(self, name):
+        col = self.Column(name)
+        return TextsToControls([self.Item(row, col) for row in range(1, int(Ctrls.LastCtrl) + 1)])
+
+    def Scenario(self, name):
+        # the control sets of a scenario and the days each one runs, as in ControlsWindow.LoadScenario
+        colFrom = self.Column(name)
+        Scene = []
+        for row in range(1, len(self.rows)):
+            text = self.Item(row, colFrom)
+            if text == '':     # end of scenario
+                break
+
+            scnCtrls = ScenarioControlsType()
+            scnCtrls.ControlsName = text
+            scnCtrls.column = self.Column(text)
+            scnCtrls.nDays = self.Item(row, colFrom + 1)
+            scnCtrls.Controls = [self.Item(cRow, scnCtrls.column) for cRow in range(1, int(Ctrls.LastCtrl) + 1)]
+            Scene.append(scnCtrls)
+
+        return Scene
+
+
+class SceneTimeline:  # steps through a scenario a day at a time: for SimRunner and the samples of Ensemble
+    def __init__(self, scene):
+        self.Scenario = scene  # type: list[ScenarioControlsType]
+        self.sceneStatus = SceneStatus.none
+        self.SceneDays = 0
+        self.nthCtrls = 0
+
+    def Controls(self):
+        return TextsToControls(self.Scenario[self.nthCtrls].Controls)
+
+    def FirstDay(self):
+        self.SceneDays = 0
+        self.nthCtrls = 0
+        self.sceneStatus = SceneStatus.run
+        return self.Controls()
+
+    def NextDay(self):
+        # the controls to switch to, or None if they stay the same
+        self.SceneDays += 1
+        if GetValue(self.Scenario[self.nthCtrls].nDays) < self.SceneDays:
+            self.nthCtrls += 1
+            if self.nthCtrls >= len(self.Scenario):
+                self.sceneStatus = SceneStatus.end
+                self.nthCtrls = 0
+                return None
+
+            self.SceneDays = 0
+            return self.Controls()
+
+        return None
@@ -0,0 +1,184 @@
+import copy
+from collections import deque
+from enum import IntEnum
+
+import numpy as np
+
+from PopulationImage import PopulationImageType
+from Scenario import SceneTimeline, SceneStatus
+from SirModel import SirModel, Cols, CountType, StatusType
+
+
+class DaySummaryType:  # what the GUI shows of a day: copied out of the model, so the model can go on
+    def __init__(self, runner):
+        model = runner.model
+        self.day = runner.day
+        self.sample = model.Sample
+        self.sceneTitle = model.SceneTitle
+        self.controls = list(model.Controls)
+        self.nthCtrls = runner.timeline.nthCtrls if runner.timeline else None
+
+        self.counts = runner.counts[:runner.day + 1].copy()
+        self.nNonInfected = model.NumNonInfected()
+        self.totalInfected = model.TotalInfected
+        self.nInfected = model.NumInfected()
+        self.nRecovered = len(model.recovered)
+        self.nDead = len(model.dead)
+        self.newInfected = model.newInfected
+        self.nRecoveredOrDead = model.nRecoveredOrDead
+
+        self.image = runner.image.Update(model).copy()
+        self.binSize = runner.image.binSize
+
+        self.runStats = model.RunStats[:, :runner.day + 1].copy()
+        self.stats = runner.Stats()
+
+
+class PlayMode(IntEnum):  # which days get a summary for the GUI to draw
+    [adaptive,      # a day whenever the GUI has taken the last one: it skips the days in between
+     daysPerFrame,  # every daysPerFrame days, and the run waits for the GUI to take each
+     fastForward,   # none until targetDay, then the run stops
+     lastPlayMode] = range(4)
+
+
+class SimRunnerType:  # steps a model a day at a time the way the GUI runs it, and keeps a summary of the days
+    def __init__(self, model, nFrames=4):
+        self.model = model
+        self.timeline = None  # type: SceneTimeline
+        self.day = 0
+        self.lastDay = 200  # the run stops here
+        self.counts = np.zeros((self.lastDay + 1, CountType.lastCountType))
+
+        self.playMode = PlayMode.adaptive
+        self.daysPerFrame = 1
+        self.targetDay = 0
+        self.playAfter = PlayMode.adaptive
+        self.daysSinceFrame = 0
+        self.image = PopulationImageType()
+        self.stats = copy.deepcopy(model.Stats)  # the finished samples, as of the last summary
+        self.frames = deque(maxlen=nFrames)  # the latest summaries: the oldest drop out
+
+    def Stats(self):
+        # a copy of the ensemble stats, taken again only when a sample has been added or they were cleared
+        if self.stats.generation != self.model.Stats.generation:
+            self.stats = copy.deepcopy(self.model.Stats)
+
+        return self.stats
+
+    def SetControls(self, controls):
+        # in place: the GUI shares the model's ControlsType
+        self.model.Controls.values = list(controls)
+        self.model.SetCntrls()
+
+    def SetScenario(self, scene):
+        self.timeline = SceneTimeline(scene) if scene else None
+        if self.timeline:
+            self.timeline.FirstDay()
+
+    def NewSample(self):
+        self.day = 0
+        if self.timeline:
+            self.SetControls(self.timeline.FirstDay())
+
+        self.model.Reset()
+        self.counts.fill(0)
+
+    def Restored(self):
+        # the model was loaded from a checkpoint: the counts before its day are not in it
+        self.day = self.model.day
+        self.lastDay = max(self.lastDay, self.day)
+        self.counts = np.zeros((max(len(self.counts), self.day + 1), CountType.lastCountType))
+        self.frames.clear()
+
+    def SetPlayMode(self, playMode, days=1):
+        # days: the days per frame, or the day to fast forward to
+        if playMode == PlayMode.fastForward and self.playMode != PlayMode.fastForward:
+            self.playAfter = self.playMode  # the mode to go back to at targetDay
+
+        self.playMode = playMode
+        self.daysSinceFrame = 0
+        if playMode == PlayMode.daysPerFrame:
+            self.daysPerFrame = max(1, days)
+        elif playMode == PlayMode.fastForward:
+            self.targetDay = min(days, SirModel.lastDay)
+            self.lastDay = max(self.lastDay, self.targetDay)
+
+    def FrameDue(self, guiReady):
+        # whether the day about to run gets a summary
+        if self.playMode == PlayMode.daysPerFrame:
+            return self.daysSinceFrame + 1 >= self.daysPerFrame
+
+        if self.playMode == PlayMode.fastForward:
+            return False
+
+        return guiReady
+
+    def AtTarget(self):
+        return self.playMode == PlayMode.fastForward and self.day >= self.targetDay
+
+    def SampleOver(self):
+        # a fast forward stops at the end of the sample, to show it: True if it does
+        if self.playMode != PlayMode.fastForward:
+            return False
+
+        self.targetDay = self.day
+        self.model.DayStats(self.day)
+        self.DayCounts()
+        return True
+
+    def DayCounts(self):
+        model = self.model
+        if self.day >= len(self.counts):
+            self.counts = np.concatenate((self.counts, np.zeros_like(self.counts)))
+
+        infected = model.infected.Items()
+        iso = infected[model.isolated.Contains(infected)]
+        isoByWatch = iso[model.data[iso, Cols.isolatedBy] == StatusType.byWatch]
+        isoBySymptom = iso[model.data[iso, Cols.isolatedBy] == StatusType.bySymptom]
+
+        # infected and not isolated
+        notIso = len(infected) - len(isoBySymptom) - len(isoByWatch) + 0.01
+
+        self.counts[self.day, CountType.infected] = len(infected)
+        self.counts[self.day, CountType.isoBySymptom] = len(isoBySymptom)
+        self.counts[self.day, CountType.isoByWatch] = len(isoByWatch)
+        self.counts[self.day, CountType.dead] = len(model.dead)
+        self.counts[self.day, CountType.infectRatio] = 100 * (model.newInfected / notIso)
+
+    def Step(self, publish=True):
+        # one day, and its summary if publish: False once lastDay is reached
+        if self.day >= self.lastDay:
+            return False
+
+        if self.timeline:
+            controls = self.timeline.NextDay()
+            if self.timeline.sceneStatus == SceneStatus.end:
+                if self.SampleOver():
+                    return True
+
+                self.NewSample()
+            elif controls:
+                self.SetControls(controls)
+
+        self.model.DayStats(self.day)
+        self.DayCounts()
+        self.daysSinceFrame += 1
+        if publish:
+            self.Publish()
+
+        if self.counts[self.day, CountType.infected] == 0:
+            if not self.SampleOver():
+                self.NewSample()
+            return True
+
+        self.day += 1
+        self.model.NextDay(self.day)
+        return True
+
+    def Publish(self):
+        self.frames.append(DaySummaryType(self))
+        self.daysSinceFrame = 0
+
+    def Summary(self):
+        # the day as it is now, without stepping
+        return DaySummaryType(self)
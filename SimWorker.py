@@ -0,0 +1,92 @@
+import threading
+
+from PyQt5 import QtCore
+
+from Ensemble import MergeRunStats
+from SimRunner import SimRunnerType, PlayMode
+
+
+class SimWorker(QtCore.QThread):  # steps the model in its own thread: the GUI takes the latest summary from runner.frames
+    paused = QtCore.pyqtSignal()  # the run got to the last day, or the day to fast forward to
+
+    def __init__(self, model, *args, **kwargs):
+        super(SimWorker, self).__init__(*args, **kwargs)
+
+        self.model = model
+        self.runner = SimRunnerType(model)
+        self.go = threading.Event()
+        self.frameTaken = threading.Event()  # the GUI is ready for another frame
+        self.frameTaken.set()
+        self.quitting = False
+
+    def Resume(self):
+        self.go.set()
+        if not self.isRunning():
+            self.start()
+
+    def Pause(self):
+        # the day being run is finished first
+        self.go.clear()
+
+    def Stop(self):
+        self.quitting = True
+        self.go.set()
+        self.wait()
+
+    def run(self):
+        while True:
+            self.go.wait()
+            if self.quitting:
+                return
+
+            runner = self.runner
+            with self.model.lock:
+                done = runner.AtTarget() or runner.day >= runner.lastDay
+                if done:
+                    # show where the run stopped: after a fast forward the next run plays again
+                    runner.Publish()
+                    if runner.playMode == PlayMode.fastForward:
+                        runner.SetPlayMode(runner.playAfter, runner.daysPerFrame)
+                else:
+                    publish = runner.FrameDue(self.frameTaken.is_set())
+                    if publish:
+                        self.frameTaken.clear()
+                    runner.Step(publish)
+
+            if done:
+                self.go.clear()
+                self.paused.emit()
+                continue
+
+            # days per frame: wait for the GUI to draw the frame
+            if publish and runner.playMode == PlayMode.daysPerFrame:
+                while not self.frameTaken.wait(0.05):
+                    if not self.go.is_set() or self.quitting:
+                        break
+
+
+class EnsembleWorker(QtCore.QThread):  # adds the samples of an ensemble to the model's stats as they come in
+    sampleDone = QtCore.pyqtSignal(int)  # the samples added so far
+
+    def __init__(self, model, samples, *args, **kwargs):
+        super(EnsembleWorker, self).__init__(*args, **kwargs)
+
+        self.model = model
+        self.samples = samples  # the generator of EnsembleSamples or AdaptiveSamples: it runs in this thread
+        self.nDone = 0
+        self.cancelled = threading.Event()
+
+    def Cancel(self):
+        # the samples already running are waited for, the rest are dropped
+        self.cancelled.set()
+
+    def run(self):
+        try:
+            for sampleStats in self.samples:
+                MergeRunStats(self.model, [sampleStats])
+                self.nDone += 1
+                self.sampleDone.emit(self.nDone)
+                if self.cancelled.is_set():
+                    break
+        finally:
+            self.samples.close()
@@ -0,0 +1,79 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from Ensemble import RunAdaptive, RunEnsemble, RunSamples, OutcomeType, StopRuleType
+from ResultCache import ResultCacheType
+from Scenario import ControlsTable
+from SirModel import SirModel
+
+
+def RunControls(table, name, nSamples, nDays=200, nWorkers=1, seed=None, folder=None, popCache=None, results=None,
+                rule=None):
+    # nSamples of the named control set or scenario, or as many as rule takes: StatType x sample x day
+    scene = table.Scenario(name) if table.IsScenario(name) else None
+    controls = None if scene else table.Controls(name)
+
+    if rule:
+        return RunAdaptive(controls, scene, rule, nDays, nWorkers, seed, folder, popCache, results)
+
+    if nWorkers == 1:
+        return RunSamples(controls, scene, nSamples, nDays, seed, folder, popCache, results)
+
+    return RunEnsemble(controls, scene, nSamples, nDays, nWorkers, seed, folder, popCache, results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the SIR model without the GUI')
+    parser.add_argument('controls', help="a controls csv, as written by 'Save Controls'")
+    parser.add_argument('names', nargs='*', help='control columns or Scenario columns to run (default: all)')
+    parser.add_argument('-n', '--samples', type=int, default=SirModel.ensembleSize, help='samples per column')
+    parser.add_argument('-d', '--days', type=int, default=200, help='last day of each sample')
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help='worker processes for the samples, 0 for one per core')
+    parser.add_argument('-s', '--seed', type=int, default=None, help='root seed: sample k runs on stream k of it')
+    parser.add_argument('-m', '--memmap', default=None, metavar='FOLDER',
+                        help='keep the populations in np.memmap files in FOLDER, for populations bigger than RAM')
+    parser.add_argument('-p', '--popCache', default=None, metavar='FOLDER',
+                        help='keep the built populations in FOLDER: later runs with the same seed and structural '
+                             'controls reuse them')
+    parser.add_argument('-c', '--cache', default='ResultCache', metavar='FOLDER',
+                        help="finished samples are kept in FOLDER and not run again: '' to run every sample")
+    parser.add_argument('--cacheMB', type=int, default=256, help='the most the result cache keeps, in MB')
+    parser.add_argument('-t', '--tolerance', type=float, default=None,
+                        help='run samples until the 95%% confidence interval of each --outcomes mean is within '
+                             'this fraction of it, instead of -n samples')
+    parser.add_argument('--outcomes', nargs='+', default=['peakNewInfected', 'dead', 'isolated'],
+                        choices=[OutcomeType(n).name for n in range(OutcomeType.lastOutcome)],
+                        help='the outcomes --tolerance looks at')
+    parser.add_argument('--minSamples', type=int, default=5, help='the fewest samples --tolerance stops at')
+    parser.add_argument('--maxSamples', type=int, default=200, help='the most samples --tolerance runs')
+    parser.add_argument('-o', '--out', default='Results', help='folder for the <name>.npy RunStats arrays')
+    args = parser.parse_args(argv)
+    if args.days > SirModel.lastDay:
+        parser.error('--days goes up to {}'.format(SirModel.lastDay))
+
+    table = ControlsTable.Load(args.controls)
+    names = args.names if args.names else table.Names()
+    os.makedirs(args.out, exist_ok=True)
+
+    seed = args.seed if args.seed is not None else np.random.SeedSequence().entropy
+    print('seed:', seed)
+    results = ResultCacheType(args.cache, args.cacheMB << 20) if args.cache else None
+    rule = None
+    if args.tolerance is not None:
+        rule = StopRuleType(args.tolerance, [OutcomeType[name] for name in args.outcomes],
+                            minSamples=args.minSamples, maxSamples=args.maxSamples)
+
+    for name in names:
+        start = time.time()
+        stats = RunControls(table, name, args.samples, args.days, args.workers or None, seed, args.memmap,
+                            args.popCache, results, rule)
+        np.save(os.path.join(args.out, name + '.npy'), stats)
+        print('{}: {} samples in {:.1f} s'.format(name, stats.shape[1], time.time() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,16 @@
 import matplotlib
 import numpy as np
 from PyQt5.QtWidgets import qApp
-import os, csv
+import os, csv, time
 
-from ControlsWindow import ControlsWindow, SceneStatus
-from SirModel import SirModel, Cols, Ctrls, GetValue, CountType, StatusType
+from Checkpoint import SaveCheckpoint, LoadCheckpoint
+from ControlsWindow import ControlsWindow
+from Ensemble import AdaptiveSamples, EnsembleSamples, StopRuleType
+from PopulationCache import SharedCache
+from ResultCache import ResultCacheType
+from SimRunner import PlayMode
+from SimWorker import SimWorker, EnsembleWorker
+from SirModel import SirModel, Cols, Ctrls, GetValue, StatusType, ControlsType
 
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas, \
     NavigationToolbar2QT as NavigationToolbar
@@ -38,6 +44,10 @@ def make_format(current, other):
 class MainWindow(QtWidgets.QMainWindow):
 
     def closeEvent(self, event):
+        if self.ensembleWorker:
+            self.ensembleWorker.Cancel()
+            self.ensembleWorker.wait()
+        self.worker.Stop()
         app = QtWidgets.QApplication.instance()
         app.closeAllWindows()
 
@@ -45,7 +55,8 @@ class MainWindow(QtWidgets.QMainWindow):
         super(MainWindow, self).__init__(*args, **kwargs)
 
         self.resize(900, 660)
-        self.cntrls = []
+        self.cntrls = []  # the line edits of the controls
+        self.controls = ControlsType()
         self.newPlot = True
 
         self.centralwidget = QtWidgets.QWidget(self)
@@ -61,7 +72,13 @@ class MainWindow(QtWidgets.QMainWindow):
         self.menuFile.setTitle("File")
         self.menubar.addAction(self.menuFile.menuAction())
 
+        self.actionOpen = QtWidgets.QAction(parent=self, text="Open")
+        self.actionOpen.setShortcut('Ctrl+O')
+        self.menuFile.addAction(self.actionOpen)
+        self.actionOpen.triggered.connect(self.OpenFile)
+
         self.actionSave = QtWidgets.QAction(parent=self, text="Save")
+        self.actionSave.setShortcut('Ctrl+S')
         self.menuFile.addAction(self.actionSave)
         self.actionSave.triggered.connect(self.SaveFile)
 
@@ -88,6 +105,43 @@ class MainWindow(QtWidgets.QMainWindow):
         self.actionStats1.setShortcut('Alt+1')
         self.menuView.addAction(self.actionStats1)
 
+        self.menuRun = QtWidgets.QMenu(self.menubar)
+        self.menuRun.setTitle("Run")
+        self.menubar.addAction(self.menuRun.menuAction())
+
+        self.actionEnsemble = QtWidgets.QAction(self)
+        self.actionEnsemble.setText("Ensemble")
+        self.actionEnsemble.triggered.connect(self.RunEnsembleClicked)
+        self.actionEnsemble.setShortcut('Alt+E')
+        self.menuRun.addAction(self.actionEnsemble)
+
+        self.actionEnsembleTolerance = QtWidgets.QAction(self)
+        self.actionEnsembleTolerance.setText("Ensemble to tolerance...")
+        self.actionEnsembleTolerance.triggered.connect(self.EnsembleToleranceClicked)
+        self.menuRun.addAction(self.actionEnsembleTolerance)
+
+        self.actionNewSeed = QtWidgets.QAction(self)
+        self.actionNewSeed.setText("New ensemble seed")
+        self.actionNewSeed.triggered.connect(self.NewSeedClicked)
+        self.menuRun.addAction(self.actionNewSeed)
+        self.menuRun.addSeparator()
+
+        self.actionFastForward = QtWidgets.QAction(self)
+        self.actionFastForward.setText("Fast forward...")
+        self.actionFastForward.triggered.connect(self.FastForwardClicked)
+        self.actionFastForward.setShortcut('Alt+F')
+        self.menuRun.addAction(self.actionFastForward)
+
+        self.actionDaysPerFrame = QtWidgets.QAction(self)
+        self.actionDaysPerFrame.setText("Days per frame...")
+        self.actionDaysPerFrame.triggered.connect(self.DaysPerFrameClicked)
+        self.menuRun.addAction(self.actionDaysPerFrame)
+
+        self.actionAdaptive = QtWidgets.QAction(self)
+        self.actionAdaptive.setText("Frames per second...")
+        self.actionAdaptive.triggered.connect(self.AdaptiveClicked)
+        self.menuRun.addAction(self.actionAdaptive)
+
         self.horizontalLayout = QtWidgets.QHBoxLayout(self.centralwidget)
         self.horizontalLayout.setContentsMargins(2, 2, 2, 2)
         self.horizontalLayout.setSpacing(3)
@@ -222,7 +276,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.TopPlotFrame.setFrameShadow(QtWidgets.QFrame.Sunken)
         self.verticalLayout = QtWidgets.QVBoxLayout(self.TopPlotFrame)
 
-        # scatter plot of people with color = status
+        # image of the people with color = status
         self.TPfigure = Figure()
         self.tpAx = self.TPfigure.add_subplot(111)
         self.Topcanvas = FigureCanvas(self.TPfigure)
@@ -233,8 +287,10 @@ class MainWindow(QtWidgets.QMainWindow):
         self.verticalLayout.addWidget(toolbar)
         self.verticalLayout.addWidget(self.Topcanvas)
 
-        x, y, s, c = np.random.rand(4, 20000)
-        self.tpAx.scatter(x, y, 1, marker='.')
+        # a pixel per guy, or per bin of guys for big populations: SimRunner updates only the changed pixels
+        self.tpImage = self.tpAx.imshow(np.full((1, 1, 3), 255, dtype=np.uint8),
+                                        interpolation='nearest', origin='lower', aspect='auto')
+        self.tpAx.set_title("The entire population")
 
         # line plot of number of people vs day
         self.BottomPlotFrame = QtWidgets.QFrame(self.splitter)
@@ -254,19 +310,31 @@ class MainWindow(QtWidgets.QMainWindow):
         self.verticalLayout_2.addWidget(toolbar2)
         self.verticalLayout_2.addWidget(self.PvDcanvas)
 
-        self.playTimer = QtCore.QTimer()
-        self.playTimer.setInterval(10)
-        self.playTimer.timeout.connect(self.Run)
+        # the model runs in the worker thread: the frame timer shows the latest day it has done
+        self.targetFps = 10
+        self.frameTimer = QtCore.QTimer()
+        self.frameTimer.setInterval(1000 // self.targetFps)
+        self.frameTimer.timeout.connect(self.ShowFrame)
 
         self.running = False
-        self.day = 0
-        self.SirModel = SirModel(self.cntrls)
+        self.results = ResultCacheType()  # the finished samples of ensemble runs
+        # ensembles run on the seed kept with the results: one of the same controls after a stats reset, in this
+        # session or an earlier one, is found in the cache.  the GUI's own samples get a new seed every session
+        self.ensembleSeed = self.results.Seed()
+        self.SirModel = SirModel(self.controls, reset=False)
+        self.SirModel.populations = SharedCache()  # a run again after changing only the epidemic controls reuses it
+        self.SirModel.Reset()
+        self.worker = SimWorker(self.SirModel)
+        self.worker.paused.connect(self.WorkerPaused)
         self.ControlsWindow = ControlsWindow(self.cntrls, self.SirModel)
+        self.ControlsWindow.sceneChanged.connect(self.SceneChanged)
+        self.ensembleWorker = None  # runs the samples of an ensemble while the GUI goes on
+        self.ensembleProgress = None
+        self.pvdSample = None  # the sample the lines of the counts plot are of
+        self.nthCtrls = None   # the scenario controls on the screen
 
         self.statsPlot = StatsPlot(self.cntrls, self.SirModel)
         self.statsPlot.show()
-        self.counts = np.arange(1000 * CountType.lastCountType).reshape(1000, CountType.lastCountType)
-        self.counts.fill(0)
 
         # self.SP2 = StatsPlot(self.cntrls, self.SirModel)
         # self.SP2.setWindowTitle("Last Stats")
@@ -281,36 +349,188 @@ class MainWindow(QtWidgets.QMainWindow):
     def RunClicked(self):
         if self.running:
             self.running = False
-            self.playTimer.stop()
+            self.worker.Pause()
+            self.frameTimer.stop()
+            self.ShowFrame()
             self.RunButton.setText('Run')
         else:
             self.running = True
-            self.playTimer.start()
+            self.worker.Resume()
+            self.frameTimer.start()
             self.RunButton.setText('Pause')
 
+    def WorkerPaused(self):
+        if self.running:
+            self.RunClicked()
+
+    def SceneChanged(self):
+        with self.SirModel.lock:
+            self.worker.runner.SetScenario(self.ControlsWindow.Scenario)
+
+    def RunEnsembleClicked(self):
+        # all the samples of the current controls at once, in worker processes
+        self.RunEnsemble()
+
+    def EnsembleToleranceClicked(self):
+        # samples until the means of the outcomes are known well enough
+        tolerance, ok = QtWidgets.QInputDialog.getDouble(
+            self, "Ensemble to tolerance", "Stop when the 95% confidence interval of the peak new infected,\n"
+                                           "dead and isolated is within this fraction of their means:",
+            value=0.05, min=0.001, max=1, decimals=3)
+        if ok:
+            self.RunEnsemble(StopRuleType(tolerance))
+
+    def RunEnsemble(self, rule=None):
+        # SirModel.ensembleSize samples, or as many as rule takes: they run in worker processes, off the GUI thread,
+        # and join the stats as each one finishes
+        if self.running:
+            self.RunClicked()
+
+        scene = self.ControlsWindow.Scenario
+        controls = None if scene else self.controls.Copy()
+
+        with self.SirModel.lock:
+            if self.SirModel.ResetStats:
+                # a stats reset asked for is done now: the next sample would throw the ensemble away with it.
+                # the sample under way ran on the controls that were replaced, so it starts again
+                self.worker.runner.NewSample()
+
+            # the streams after the GUI's current sample: an ensemble run again without a stats reset gets new ones.
+            # after a reset that is always streams 1 to ensembleSize of ensembleSeed, so an ensemble of controls
+            # run before comes from the result cache
+            firstStream = self.SirModel.Sample + 1
+
+        if rule:
+            nSamples = rule.maxSamples
+            samples = AdaptiveSamples(controls, scene, rule, 200, seed=self.ensembleSeed,
+                                      firstStream=firstStream, results=self.results)
+        else:
+            nSamples = SirModel.ensembleSize
+            samples = EnsembleSamples(controls, scene, nSamples, 200, seed=self.ensembleSeed,
+                                      firstStream=firstStream, results=self.results)
+
+        self.ensembleProgress = QtWidgets.QProgressDialog(
+            "Running samples until the tolerance is met" if rule else "Running the ensemble", "Stop", 0, nSamples, self)
+        self.ensembleProgress.setWindowTitle("Ensemble")
+        self.ensembleProgress.setMinimumDuration(0)
+        self.ensembleProgress.setValue(0)
+
+        self.ensembleWorker = EnsembleWorker(self.SirModel, samples)
+        self.ensembleWorker.sampleDone.connect(self.EnsembleSampleDone)
+        self.ensembleWorker.finished.connect(self.EnsembleFinished)
+        self.ensembleProgress.canceled.connect(self.ensembleWorker.Cancel)
+        self.EnableRun(False)
+        self.ensembleWorker.start()
+
+    def EnsembleSampleDone(self, nDone):
+        self.ensembleProgress.setValue(nDone)
+        with self.SirModel.lock:
+            summary = self.worker.runner.Summary()
+
+        self.statsPlot.Redraw(summary)
+
+    def EnsembleFinished(self):
+        self.ensembleProgress.close()
+        self.ensembleWorker = None
+        self.EnableRun(True)
+
+        with self.SirModel.lock:
+            summary = self.worker.runner.Summary()
+
+        self.statsPlot.Redraw(summary)
+        self.statsPlot.show()
+        self.DrawStuff(summary)
+
+    def EnableRun(self, enable):
+        # the GUI's own sample waits while an ensemble runs: its stream comes after the ensemble's
+        for widget in (self.RunButton, self.Day0, self.actionEnsemble, self.actionEnsembleTolerance,
+                       self.actionNewSeed, self.actionFastForward, self.actionOpen):
+            widget.setEnabled(enable)
+
+    def NewSeedClicked(self):
+        # ensembles from now on run new samples, and so do later sessions
+        self.ensembleSeed = self.results.NewSeed()
+        QtWidgets.QMessageBox.information(self, "New ensemble seed",
+                                          "Ensembles now run on seed {}.".format(self.ensembleSeed))
+
+    def FastForwardClicked(self):
+        # run to a day without drawing, then show it
+        runner = self.worker.runner
+        if runner.day >= SirModel.lastDay:
+            return
+
+        day, ok = QtWidgets.QInputDialog.getInt(self, "Fast forward", "Run to day:",
+                                                value=min(runner.day + 100, SirModel.lastDay),
+                                                min=runner.day + 1, max=SirModel.lastDay)
+        if not ok:
+            return
+
+        with self.SirModel.lock:
+            runner.SetPlayMode(PlayMode.fastForward, day)
+
+        if not self.running:
+            self.RunClicked()
+
+    def DaysPerFrameClicked(self):
+        runner = self.worker.runner
+        days, ok = QtWidgets.QInputDialog.getInt(self, "Days per frame", "Days between frames:",
+                                                 value=runner.daysPerFrame, min=1, max=1000)
+        if ok:
+            with self.SirModel.lock:
+                runner.SetPlayMode(PlayMode.daysPerFrame, days)
+
+    def AdaptiveClicked(self):
+        # the model runs flat out and the frames skip as many days as they must to keep up
+        fps, ok = QtWidgets.QInputDialog.getInt(self, "Frames per second", "Frames per second:",
+                                                value=self.targetFps, min=1, max=60)
+        if ok:
+            self.targetFps = fps
+            with self.SirModel.lock:
+                self.worker.runner.SetPlayMode(PlayMode.adaptive)
+
     def ShowControls(self):
         self.ControlsWindow.show()  # Restore from systray
         self.ControlsWindow.raise_()
 
     def SaveFile(self):
-        pass
+        # a checkpoint of the model as it is now
+        fileName, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Save checkpoint", "", "Checkpoints (*.sirck)")
+        if fileName:
+            SaveCheckpoint(self.SirModel, fileName)
+
+    def OpenFile(self):
+        # go on from a checkpoint
+        fileName, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Open checkpoint", "", "Checkpoints (*.sirck)")
+        if not fileName:
+            return
+
+        if self.running:
+            self.RunClicked()
+
+        with self.SirModel.lock:
+            LoadCheckpoint(fileName, self.SirModel)
+            for edit, value in zip(self.cntrls, self.controls):
+                edit.setText(str(value))
+            self.worker.runner.Restored()
+            summary = self.worker.runner.Summary()
+
+        self.statsPlot.Redraw(summary)
+        self.DrawStuff(summary)
 
     def DayToZero(self):
-        self.statsPlot.Update(200)
-        self.ControlsWindow.sceneStatus = SceneStatus.end
-        self.day = 0
-        self.counts.fill(0)
+        self.statsPlot.Redraw()
 
         # if self.SirModel.ctrlsChanged:  # at least one controls has changed
         #     self.ResetStatsClicked()
 
-        self.SirModel.Reset()
+        with self.SirModel.lock:
+            self.worker.runner.NewSample()
 
         if not self.running:
             self.RunClicked()
 
     def ResetStatsClicked(self):
-        self.statsPlot.Update(200)
+        self.statsPlot.Redraw()
         self.statsPlot.SaveWindow()
         self.SirModel.ResetStats = True
 
@@ -334,40 +554,27 @@ class MainWindow(QtWidgets.QMainWindow):
         self.newPlot = True
         self.PvDax.cla()
 
-    def Run(self):
-        if not self.running:
-            return
-
-        if self.day >= 200:  # see: SirModel.Reset-- only save data for 1000 days
-            self.RunClicked()
-            return
+    def ShowFrame(self):
+        # the latest day the worker has finished: the days in between are not drawn
+        start = time.perf_counter()
+        summary = None
+        while self.worker.runner.frames:
+            summary = self.worker.runner.frames.popleft()
 
-        # check if there is a Scenario running
-        if self.ControlsWindow.Scenario:
-            if self.ControlsWindow.sceneStatus == SceneStatus.run:
-                self.ControlsWindow.NextDay()
+        if summary is not None:
+            self.statsPlot.Update(summary)
+            self.DrawStuff(summary)
 
-            elif self.ControlsWindow.sceneStatus == SceneStatus.end:
-                self.DayToZero()
-                self.ControlsWindow.FirstDay()
-
-        self.statsPlot.Update(self.day)
-
-        self.DrawStuff()
-
-        if self.counts[self.day, CountType.infected] == 0:  # the number of infected = 0
-            self.DayToZero()
-            return
+        self.worker.frameTaken.set()
 
-        self.day += 1
-        self.SirModel.Testing(self.day)
-        self.SirModel.InfectedToRecovered(self.day)
-        self.SirModel.SpreadInfection(self.day)
+        # keep to targetFps, or as close as the drawing allows
+        drawMs = 1000 * (time.perf_counter() - start)
+        self.frameTimer.setInterval(max(1, round(1000 / self.targetFps - drawMs)))
 
     def AddParameters(self):
 
         ctrlNames = [str(Ctrls(x)) for x in range(Ctrls.LastCtrl)]
-        ctrlVals = Ctrls.GetDefaults()
+        ctrlVals = self.controls.values
 
         for n in range(int(Ctrls.LastCtrl)):
             pName = ctrlNames[n].split('.')[1]  # e.g. pName = 'Cntrls.nPeeps' just need 'nPeeps'
@@ -403,7 +610,9 @@ class MainWindow(QtWidgets.QMainWindow):
             return
 
         if newValue != oldValue:
-            self.SirModel.cs[n] = newValue
+            with self.SirModel.lock:
+                self.controls[n] = newValue
+                self.SirModel.cs[n] = newValue
             SirModel.ctrlsChanged = True
 
     def Way1(self):
@@ -412,116 +621,74 @@ class MainWindow(QtWidgets.QMainWindow):
         return nsp
 
     def Way2(self):
-        nsp = self.SirModel.everyone[self.SirModel.data[:, Cols.status] == StatusType.nonInfected]
+        nsp = np.flatnonzero(self.SirModel.data[:, Cols.status] == StatusType.nonInfected)
         nsp = nsp[self.SirModel.data[nsp, Cols.serviceGuy] == 0]
         return nsp
 
-    def DrawStuff(self):
-
-        # non-service susceptables
-        nsp = np.logical_and(self.SirModel.data[:, Cols.status] == StatusType.nonInfected, (self.SirModel.data[:, Cols.serviceGuy] == 0))
-        # nsp = self.Way1()
-        # nsp = self.Way2()
-
-        # service susceptables
-        ssp = np.logical_and(self.SirModel.data[:, Cols.status] == StatusType.nonInfected, (self.SirModel.data[:, Cols.serviceGuy] == 1))
-
-        # infected
-        infected = self.SirModel.everyone[self.SirModel.data[:,Cols.status] == StatusType.infected]
-
-        # non-service infected
-        nip = infected[self.SirModel.data[infected, Cols.serviceGuy] == 0]
-
-        # service infected
-        sip = infected[self.SirModel.data[infected, Cols.serviceGuy] == 1]
-
-        # recovered
-        ir = self.SirModel.data[:, Cols.status] == 22
-
-        # dead
-        id = self.SirModel.everyone[self.SirModel.data[:, Cols.status] == 99]
-
-        # isolated
-        iso = infected[self.SirModel.data[infected, Cols.isolatedOn] <= self.day]
-
-        # iso by watch
-        isoByWatch = iso[self.SirModel.data[iso, Cols.isolatedBy] == StatusType.byWatch]
-
-        # iso by symptom
-        isoBySymptom = iso[self.SirModel.data[iso, Cols.isolatedBy] == StatusType.bySymptom]
-
-        # with watch
-        hasWatch = self.SirModel.everyone[self.SirModel.data[:, Cols.hasWatch] == 1]
-
-        # infected and not isolated
-        notIso = len(infected) - len(isoBySymptom) - len(isoByWatch) + 0.01
-
-        self.counts[self.day, CountType.infected] = len(infected)
-        self.counts[self.day, CountType.isoBySymptom] = len(isoBySymptom)
-        self.counts[self.day, CountType.isoByWatch] = len(isoByWatch)
-        self.counts[self.day, CountType.dead] = len(id)
-        self.counts[self.day, CountType.infectRatio] = 100*(self.SirModel.newInfected / notIso)
-
-        self.setWindowTitle('SIR Model- ' + self.SirModel.SceneTitle)
-
-        if self.day % 10 == 0:
-            x = self.SirModel.data[:, Cols.xPos]
-            y = self.SirModel.data[:, Cols.yPos]
-
-            self.tpAx.cla()
-            self.tpAx.set_title("The entire population")
-            # self.tpAx.scatter(x[nsp], y[nsp], s=12, color='b', marker='.', label='non service non infected')
-            self.tpAx.scatter(x[ssp], y[ssp], s=18, color='b', marker='+')
-            self.tpAx.scatter(x[nip], y[nip], s=4, color='r', marker='.')
-            self.tpAx.scatter(x[sip], y[sip], color='r', marker='+')
-            self.tpAx.scatter(x[ir], y[ir], s=4, color='g', marker='.')
-            self.tpAx.scatter(x[id], y[id], color='k', marker='*')
-            self.tpAx.scatter(x[iso], y[iso], s=4, color='y', marker='.')
-            self.tpAx.scatter(x[hasWatch], y[hasWatch], s=4, color='m', marker='.')
-            # self.tpAx.scatter(x[hasWatch], y[hasWatch], color='m', marker='.', facecolors='none', edgecolors='m')
-
-            if self.newPlot:
-                self.PvDax.cla()
-                self.ax2.cla()
-                self.PvDax.set_title("Counts of people vs Day")
-                self.PvDax.set_xlabel('day')
-                self.PvDax.set_ylabel('Number of Infected')
-                self.ax2.set_ylabel('New infected / Non-isolated')
-                self.ax2.yaxis.label.set_color('grey')
-
-            days = np.arange(0, self.day + 1)
-
+    def DrawStuff(self, summary):
+        self.setWindowTitle('SIR Model- ' + summary.sceneTitle)
+
+        # a scenario moved on to its next controls
+        if summary.nthCtrls is not None and summary.nthCtrls != self.nthCtrls:
+            for edit, value in zip(self.cntrls, summary.controls):
+                edit.setText(str(value))
+        self.nthCtrls = summary.nthCtrls
+
+        image = summary.image
+        size = summary.binSize
+        self.tpImage.set_data(image)
+        self.tpImage.set_extent((-0.5, image.shape[1] * size - 0.5, -0.5, image.shape[0] * size - 0.5))
+
+        if self.newPlot:
+            self.PvDax.cla()
+            self.ax2.cla()
+            self.PvDax.set_title("Counts of people vs Day")
+            self.PvDax.set_xlabel('day')
+            self.PvDax.set_ylabel('Number of Infected')
+            self.ax2.set_ylabel('New infected / Non-isolated')
+            self.ax2.yaxis.label.set_color('grey')
+
+        days = np.arange(0, summary.day + 1)
+        axes = [self.PvDax, self.PvDax, self.PvDax, self.PvDax, self.ax2]
+
+        # the lines of earlier samples stay on the plot until it is cleared: a new sample gets new lines
+        if self.newPlot or summary.sample != self.pvdSample:
             colors = ['r', 'y', 'm', 'k', 'silver']
             labels = ['<- infected', '<- isoBySymptom', '<- isoByWatch', '<- dead', 'infectRatio ->']
-            axes = [self.PvDax, self.PvDax, self.PvDax, self.PvDax, self.ax2]
             width = ['1', '.5', '.5', '.5', '.5']
             dash = [False, True, False, False, True]
 
-            plots = [0] * 5
+            self.pvdPlots = [0] * 5
             for iplt in range(5):
-                plots[iplt], = axes[iplt].plot(days, self.counts[days, iplt], color=colors[iplt], linewidth=width[iplt])
+                self.pvdPlots[iplt], = axes[iplt].plot(days, summary.counts[days, iplt], color=colors[iplt], linewidth=width[iplt])
                 if dash[iplt]:
-                    plots[iplt].set_dashes([6, 2])
+                    self.pvdPlots[iplt].set_dashes([6, 2])
 
-            self.PvDax.legend(plots, labels, loc='best')
+            self.PvDax.legend(self.pvdPlots, labels, loc='best')
 
+            self.pvdSample = summary.sample
             self.newPlot = False
             self.PvDax.grid(True)
-
-            self.Topcanvas.draw()
-            self.PvDcanvas.draw()
-
-        nonInfected = np.count_nonzero(self.SirModel.data[:,Cols.status] == StatusType.nonInfected)
-        recovered = np.count_nonzero(self.SirModel.data[:,Cols.status] == StatusType.recovered)
-        stats = str(self.day) \
-                + '\n' + str(self.SirModel.Sample)  \
-                + '\n' + str(nonInfected) \
-                + '\n' + str(self.SirModel.TotalInfected) \
-                + '\n' + str(len(infected)) \
-                + '\n' + str(recovered) \
-                + '\n' + str(len(id)) \
-                + '\n' + str(self.SirModel.newInfected) \
-                + '\n' + str(self.SirModel.nRecoveredOrDead)
+        else:
+            for iplt in range(5):
+                self.pvdPlots[iplt].set_data(days, summary.counts[days, iplt])
+
+        for ax in (self.PvDax, self.ax2):
+            ax.relim()
+            ax.autoscale_view()
+
+        self.Topcanvas.draw()
+        self.PvDcanvas.draw()
+
+        stats = str(summary.day) \
+                + '\n' + str(summary.sample)  \
+                + '\n' + str(summary.nNonInfected) \
+                + '\n' + str(summary.totalInfected) \
+                + '\n' + str(summary.nInfected) \
+                + '\n' + str(summary.nRecovered) \
+                + '\n' + str(summary.nDead) \
+                + '\n' + str(summary.newInfected) \
+                + '\n' + str(summary.nRecoveredOrDead)
         self.StatsData.setText(stats)
 
             # Day\n
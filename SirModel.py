@@ -1,16 +1,19 @@
 from typing import Any, List
 
+import hashlib
+import json
 import numpy as np
 import math
+import threading
 from enum import IntEnum
-from PyQt5 import QtWidgets
-
-# Python program to illustrate union
-# Without repetition
-def Union(lst1, lst2):
-    final_list = list(set(lst1) | set(lst2))
-    return final_list
 
+from Adjacency import AdjacencyType, GroupedRanges
+from ArrayStore import ArrayStoreType
+from ContactLog import ContactLogType
+from EventCalendar import EventCalendarType, EventType
+from IndexSet import IndexSetType
+from EnsembleStats import EnsembleStatsType
+from RandomPool import RandomPoolType
 
 def GetValue(text):
     try:
@@ -23,6 +26,16 @@ def GetValue(text):
     return value
 
 
+def GroupedChoice(owner, nGroups, nPick, urand):
+    # pick up to nPick[i] entries of group i at random, without replacement
+    # urand is one uniform per entry.  returns the positions kept
+    order = np.lexsort((urand, owner))
+    counts = np.bincount(owner, minlength=nGroups)
+    firsts = np.cumsum(counts) - counts
+    rank = np.arange(owner.size) - firsts[owner[order]]
+    return order[rank < nPick[owner[order]]]
+
+
 class CountType(IntEnum):  # cols of the SirModel data array
     [infected,
      isoBySymptom,
@@ -47,7 +60,24 @@ class StatType(IntEnum):  # index into RunStats
      isoBySymptom,
      isoByWatch,
      removed,
-     lastRunStat] = range(6)
+     dead,
+     lastRunStat] = range(7)
+
+
+class SpreadMode(IntEnum):  # how SirModel.SpreadInfection visits the infected
+    batch = 0   # all spreaders in one vectorized pass
+    loop = 1    # one spreader at a time, with the per-guy draws of the first model: the reference for batch
+
+
+class DrawType(IntEnum):  # what the keyed uniforms of a paired run are for: different draws never share them
+    [course,        # the days a guy is sick
+     dies,
+     testOrder,     # who is tested first
+     friendsToday,  # how many friends a spreader meets
+     friendPick,
+     crowdPick,     # strangers picked from a crowded window
+     strangerDraw,  # strangers drawn from a roomy window
+     infects] = range(8)
 
 
 class Cols(IntEnum):  # cols of the SirModel data array
@@ -65,6 +95,54 @@ class Cols(IntEnum):  # cols of the SirModel data array
      lastDataCol] = range(12)
 
 
+class PopulationType:  # SirModel.data: one contiguous array per Cols field, indexed like the old matrix
+    dtypes = {Cols.family: np.int32,      # first guy of the family
+              Cols.status: np.uint8,
+              Cols.dayInfec: np.int16,
+              Cols.serviceGuy: np.bool_,
+              Cols.hasWatch: np.bool_,
+              Cols.needTest: np.uint16,
+              Cols.symptomatic: np.bool_,
+              Cols.isolatedOn: np.int32,
+              Cols.isolatedBy: np.uint8}
+
+    def __init__(self, nPeeps, gridCols=1, store=None, structure=None):
+        # structure: the columns of a built population, named 'data.<col>': taken as they are, not copied.
+        # they may be shared with the population cache, and the day phases never change them
+        store = store or ArrayStoreType()
+        structure = structure or {}
+        self.nPeeps = nPeeps
+        self.gridCols = gridCols  # xPos and yPos are worked out from the guy's place in the grid
+        self.columns = {}
+        for col, dtype in self.dtypes.items():
+            name = 'data.' + Cols(col).name
+            self.columns[col] = structure[name] if name in structure else store.Zeros(name, nPeeps, dtype)
+
+    def Column(self, col):
+        if col == Cols.xPos:
+            return np.mod(np.arange(self.nPeeps), self.gridCols)
+
+        if col == Cols.yPos:
+            return np.arange(self.nPeeps) // self.gridCols
+
+        return self.columns[col]
+
+    def __getitem__(self, key):
+        rows, col = key
+        if col in (Cols.xPos, Cols.yPos):
+            rows = np.arange(self.nPeeps)[rows]
+            return np.mod(rows, self.gridCols) if col == Cols.xPos else rows // self.gridCols
+
+        return self.columns[col][rows]
+
+    def __setitem__(self, key, value):
+        rows, col = key
+        self.columns[col][rows] = value
+
+    def NBytes(self):
+        return sum(column.nbytes for column in self.columns.values())
+
+
 class Ctrls(IntEnum):
     [nPeeps,
      minDaysSick,
@@ -114,103 +192,280 @@ class Ctrls(IntEnum):
 
         return cs
 
-class PeepType:
-    def __init__(self):
-        self.friends = 0
-        self.family = 0
-        self.contacts = 0
-        self.id = 0
+class ControlsType:  # the value of every Ctrls, what SirModel runs on
+    def __init__(self, values=None):
+        if values is None:
+            values = Ctrls.GetDefaults()
+
+        self.values = [GetValue(value) for value in values]
+
+    def __getitem__(self, n):
+        return self.values[n]
+
+    def __setitem__(self, n, value):
+        self.values[n] = value
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def SetText(self, n, text):
+        # False if the text is not a number
+        value = GetValue(text)
+        if value is None:
+            return False
+
+        self.values[n] = value
+        return True
+
+    def Copy(self):
+        return ControlsType(self.values)
+
+
+# the controls the families, friends and flags of a population are built from
+structureCtrls = (Ctrls.nPeeps, Ctrls.nInFamily, Ctrls.nFriends, Ctrls.FriendRadius,
+                  Ctrls.pServiceGuy, Ctrls.pShowSymptoms, Ctrls.pHaveWatch)
+structureVersion = 1  # goes up when the way a population is built changes: older cached ones no longer match
+
+
+def StructureKey(controls, seed, stream):
+    # a population built from the same structural controls and population stream is the same population
+    text = json.dumps([structureVersion, [controls[ctrl] for ctrl in structureCtrls], str(seed), stream])
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def SampleSeed(seed, stream):
+    # the SeedSequence of one sample: sample streams of the same root seed never overlap
+    return np.random.SeedSequence(seed, spawn_key=(stream,))
+
+
+def MakeFamilies(controls, rng):
+    # families are runs of adjacent guys with poisson(nInFamily) + 1 members
+    # returns the first and one past the last member of each family
+    nPeeps = controls[Ctrls.nPeeps]
+    sizes = np.zeros(0, dtype=int)
+    while sizes.sum() < nPeeps:
+        nMore = int(1.1 * (nPeeps - sizes.sum()) / (controls[Ctrls.nInFamily] + 1)) + 10
+        sizes = np.append(sizes, rng.poisson(controls[Ctrls.nInFamily], nMore) + 1)
+
+    ends = np.cumsum(sizes)
+    nFamilies = np.searchsorted(ends, nPeeps) + 1
+    starts = ends[:nFamilies] - sizes[:nFamilies]
+    ends = np.minimum(ends[:nFamilies], nPeeps)
+    return starts, ends
+
+
+def MakeFriends(family, controls, rng, store=None):
+    # every guy gets nFriends picked at random from the FriendRadius guys either side, less the family
+    # done a chunk of guys at a time: each row holds the window of one guy
+    store = store or ArrayStoreType()
+    nPeeps = controls[Ctrls.nPeeps]
+    radius = int(controls[Ctrls.FriendRadius])
+    nFriends = min(int(controls[Ctrls.nFriends]), 2 * radius)
+    offsets = np.arange(-radius, radius)
+    chunk = max(1, 4000000 // max(1, 2 * radius))
+
+    # room for nFriends each: the rows are written one after the other, so the unused tail is never touched
+    indptr = store.Zeros('friends.indptr', nPeeps + 1, np.int64)
+    indices = store.Zeros('friends.indices', nPeeps * nFriends, np.int32)
+    for first in range(0, nPeeps, chunk):
+        ids = np.arange(first, min(first + chunk, nPeeps))
+        window = ids[:, None] + offsets[None, :]
+        valid = (window >= 0) & (window < nPeeps - 1)
+        valid &= (window < family.First(ids)[:, None]) | (window > family.Last(ids)[:, None])
 
-    def SetFamily(self, id, familyMembers):
-        self.id = id
-        self.family = familyMembers
+        # the nFriends lowest random keys of the valid guys in each row
+        keys = rng.random(window.shape)
+        keys[~valid] = 2
+        picked = np.argpartition(keys, nFriends - 1, axis=1)[:, :nFriends] if nFriends > 0 \
+            else np.zeros((len(ids), 0), dtype=int)
+        rows = np.arange(len(ids))[:, None]
+        picked = np.where(valid[rows, picked], window[rows, picked], nPeeps)
+        picked.sort(axis=1)
 
-    def MakeFriends(self, controls):
-        belowStart = max(0, self.id -  controls[Ctrls.FriendRadius])
-        aboveEnd = min(controls[Ctrls.nPeeps] - 1, self.id + controls[Ctrls.FriendRadius])
-        self.friends = np.arange(belowStart, aboveEnd)
-        self.friends = np.setdiff1d(self.friends, self.family)
-        self.friends = np.random.permutation(self.friends)
-        self.friends = self.friends[:controls[Ctrls.nFriends]]
-        self.friends = np.sort(self.friends)
+        base = indptr[first]
+        indptr[ids + 1] = base + np.cumsum(np.count_nonzero(picked < nPeeps, axis=1))
+        indices[base:indptr[ids[-1] + 1]] = picked[picked < nPeeps]
+
+    return AdjacencyType(indptr, indices[:indptr[-1]])
+
+
+def PickGuys(column, nPicked, rng, chunk):
+    # set column to 1 for nPicked guys picked at random, a chunk of guys at a time:
+    # how many of the picks fall in a chunk is hypergeometric, and they are picked from the chunk
+    nLeft = len(column)
+    for first in range(0, len(column), chunk):
+        size = min(chunk, nLeft)
+        inChunk = rng.hypergeometric(size, nLeft - size, nPicked) if nPicked > 0 else 0
+        column[first + rng.permutation(size)[:inChunk]] = 1
+        nPicked -= inChunk
+        nLeft -= size
 
 
 class SirModel:
     EndOfTime = 999999
+    lastDay = int(np.iinfo(np.int16).max)  # dayInfec and the contact log keep days as int16: no run goes past it
+    maxDaysSick = 20  # nobody is sick for more than 20 days
 
-    maxSamples = 20
-    maxSampleDay = 500
+    ensembleSize = 20  # samples in an ensemble run from the menu or SirBatch
+    maxSampleDay = 500  # days RunStats holds at first: it grows for longer samples
+    spreadChunk = 1 << 17  # spreaders per pass of SpreadInfectionBatch: bounds the day's temporaries
 
-    def __init__(self, cntrlsIn):
+    def __init__(self, cntrlsIn=None, seed=None, stream=None, reset=True, folder=None):
+        # reset=False leaves the population empty: for Checkpoint.LoadCheckpoint to fill in
+        # folder: keep the population in np.memmap files there, for populations bigger than RAM
         self.SceneTitle = 'Relaxed SIP'
         self.cs = []
         self.sipEndDay = 0
         self.SipStartDays = 0
         self.SipEndDays = 0
         self.TotalInfected = 0
-        self.serviceGuys = 0
-        self.nonServiceGuys = 0
-        self.Controls = cntrlsIn
+        self.Controls = cntrlsIn if cntrlsIn is not None else ControlsType()  # type: ControlsType
         self.SetCntrls()
         self.newInfected = 0
         self.nRecoveredOrDead = 0
-        self.everyone = []
-        self.Peeps = []  # type: list[PeepType]
+        self.store = ArrayStoreType(folder)  # the per-guy arrays of the population are made here
+        self.populations = None  # a PopulationCacheType: Reset takes a population built before from it
+        self.family = AdjacencyType(np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32))
+        self.friends = AdjacencyType(np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32))
+        self.contactLog = ContactLogType()  # the guys each watch wearer infected, not yet warned
+        self.spreadMode = SpreadMode.batch
+
+        # the guys in each status, kept up to date by SetStatus so a day never scans everyone
+        self.infected = IndexSetType(0)
+        self.recovered = IndexSetType(0)
+        self.dead = IndexSetType(0)
+        self.isolated = IndexSetType(0)  # guys with isolatedOn <= day
+        self.alerted = IndexSetType(0)   # guys with needTest != 0
+        self.testable = IndexSetType(0)  # infected guys showing symptoms, not yet isolated
+        self.isolatedToday = np.zeros(0, dtype=np.int64)
+
+        # the day each infected guy shows symptoms, recovers or dies, and each tested guy isolates
+        self.calendar = EventCalendarType()
+        self.day = 0
 
         self.ctrlsChanged = False
+        self.lock = threading.RLock()  # held while a day runs: take it to change the model or its controls
         self.Sample = -1
-        self.RunStats = np.zeros([StatType.lastRunStat, self.maxSamples, self.maxSampleDay])  # 3 types of stats, 20 samples, 150 days
+        self.Seed = seed if seed is not None else np.random.SeedSequence().entropy  # root seed of every sample
+        self.Stream = 0  # the random stream of the current sample: replay it with Reset(stream)
+        self.rng = np.random.default_rng(SampleSeed(self.Seed, self.Stream))
+        self.randoms = RandomPoolType(self.rng)  # the uniforms of the day phases come from here
+        self.paired = False  # the day phases use keyed uniforms: see Uniforms
+        self.RunStats = np.zeros([StatType.lastRunStat, self.maxSampleDay])  # the stats of the current sample, by day
+        self.Stats = EnsembleStatsType(StatType.lastRunStat)  # the stats of all the finished samples
         self.ResetStats = False
 
-        self.data = np.zeros((self.cs[Ctrls.nPeeps], Cols.lastDataCol))
-        self.Reset()
+        self.data = PopulationType(0)
+        if reset:
+            self.Reset(stream)
 
     def SetCntrls(self):
-        self.cs.clear()
-        for i, ctrl in enumerate(self.Controls):
-            line: QtWidgets.QLineEdit = ctrl
-            text = line.text()
-            value = GetValue(text)
+        self.cs = list(self.Controls)
 
-            self.cs.append(value)
+    def Uniforms(self, purpose, *keys):
+        # one uniform per entry of keys, the guys (and day) a draw is for.  paired, they are keyed by them, so runs of
+        # other controls on the same stream draw the same numbers for the same guys
+        if self.paired:
+            return self.randoms.Keyed(purpose, *keys)
 
-    def InfectedToRecovered(self, day):
-        infected = np.nonzero(self.data[:, Cols.status] == StatusType.infected)[0]
-        longSickGuys = infected[day - self.data[infected, Cols.dayInfec] > self.cs[Ctrls.minDaysSick]]
+        return self.randoms.Uniform(np.broadcast(*keys).size)
 
-        if longSickGuys.size == 0:
-            return
+    def SickDays(self, ids):
+        # the day of their illness infected guys are on: the draws of a spreader are keyed by it, not by the day,
+        # so a guy that falls ill earlier in one of a pair of runs still meets and infects the same guys
+        return self.day - self.data[ids, Cols.dayInfec].astype(np.int64)
 
-        urand = np.random.sample(len(longSickGuys))
-        died = longSickGuys[self.cs[Ctrls.pDie] > urand]
-        self.data[died, Cols.status] = 99
-        infected = np.nonzero(self.data[:, Cols.status] == StatusType.infected)
+    def SetStatus(self, ids, status):
+        for statusSet in (self.infected, self.recovered, self.dead, self.testable):
+            statusSet.Remove(ids)
 
-        gonners = np.nonzero((day - self.data[infected, Cols.dayInfec]) > 20)[0]
-        self.data[gonners, Cols.status] = 99
+        if status == StatusType.infected:
+            self.infected.Add(ids)
+        elif status == StatusType.recovered:
+            self.recovered.Add(ids)
+        elif status == StatusType.dead:
+            self.dead.Add(ids)
 
-        urand2 = np.random.sample(len(longSickGuys))
+        self.data[ids, Cols.status] = status
 
-        # recovers = longSickGuys(S.cs(Ctrls.pRecover) > randDraw);
+    def Infect(self, ids, day):
+        if len(ids) == 0:  # the loop mode infects a few guys at a time, most often none
+            return
 
-        recovers = longSickGuys[self.cs[Ctrls.pRecover] > urand2]
-        self.data[recovers, Cols.status] = 22
+        self.data[ids, Cols.dayInfec] = day
+        self.SetStatus(ids, StatusType.infected)
+
+        # symptoms show after DaysTillSymptoms
+        showSymptoms = ids[self.data[ids, Cols.symptomatic] == 1]
+        self.calendar.Schedule(day + self.cs[Ctrls.DaysTillSymptoms] + 1, EventType.symptoms, showSymptoms)
+
+        # after minDaysSick a sick guy recovers with pRecover each day, and dies with pDie if he does not:
+        # a death drawn on a day he also recovers counts as a recovery, as in the first model.
+        # the number of days until one of them happens is geometric
+        pRecover = self.cs[Ctrls.pRecover]
+        pDie = (1 - pRecover) * self.cs[Ctrls.pDie]
+        pOut = pRecover + pDie
+        if pOut > 0:
+            outDay = day + self.cs[Ctrls.minDaysSick] + self.randoms.Geometric(pOut, len(ids),
+                                                                              self.Uniforms(DrawType.course, ids))
+        else:
+            outDay = np.full(len(ids), self.EndOfTime)
+        dies = self.Uniforms(DrawType.dies, ids) * pOut < pDie
+
+        # and nobody is sick for more than maxDaysSick
+        lastDay = day + self.maxDaysSick + 1
+        dies |= outDay >= lastDay
+        outDay = np.minimum(outDay, lastDay)
+
+        self.calendar.Schedule(outDay[dies], EventType.die, ids[dies])
+        self.calendar.Schedule(outDay[~dies], EventType.recover, ids[~dies])
+
+    def Isolate(self, ids, day, by):
+        self.data[ids, Cols.isolatedBy] = by
+        self.data[ids, Cols.isolatedOn] = day
+        self.testable.Remove(ids)
+        if day <= self.day:
+            self.isolated.Add(ids)
+            self.isolatedToday = np.union1d(self.isolatedToday, ids)
+        else:
+            self.calendar.Schedule(day, EventType.isolate, ids)
+
+    def StartDay(self, day):
+        # the events due today that the phases of the day depend on
+        self.day = day
+        self.randoms.StartDay()
+        self.KeepStatsDay(day)
+
+        # guys tested earlier go into isolation: unless a watch isolated them since
+        isolating = self.calendar.Pop(day, EventType.isolate)
+        self.isolatedToday = isolating[self.data[isolating, Cols.isolatedOn] == day]
+        self.isolated.Add(self.isolatedToday)
+
+        # guys that start to show symptoms join the guys waiting for a test
+        symptoms = self.calendar.Pop(day, EventType.symptoms)
+        symptoms = symptoms[self.data[symptoms, Cols.status] == StatusType.infected]
+        self.testable.Add(symptoms[self.data[symptoms, Cols.isolatedOn] == self.EndOfTime])
 
-        self.nRecoveredOrDead = np.count_nonzero(recovers) + np.count_nonzero(died) + np.count_nonzero(gonners)
+    def InfectedToRecovered(self, day):
+        died = self.calendar.Pop(day, EventType.die)
+        died = died[self.data[died, Cols.status] == StatusType.infected]
+        self.SetStatus(died, StatusType.dead)
 
-        self.RunStats[StatType.removed,
-                      self.Sample,
-                      day] = self.nRecoveredOrDead
+        recovers = self.calendar.Pop(day, EventType.recover)
+        recovers = recovers[self.data[recovers, Cols.status] == StatusType.infected]
+        self.SetStatus(recovers, StatusType.recovered)
 
-    def CheckWatch(self, day):
-        # find newly infected guys with a watch
-        watchGuys = self.everyone[self.cs[:,Cols.hasWatch] == 1]
+        self.nRecoveredOrDead = len(recovers) + len(died)
 
-        pass
+        self.RunStats[StatType.removed, day] = self.nRecoveredOrDead
+        self.RunStats[StatType.dead, day] = len(died)
 
     def DailySummary(self, day):
 
-        infected = self.everyone[self.data[:, Cols.status] == StatusType.infected]
+        infected = self.infected.Items()
         isolated = infected[self.data[infected, Cols.isolatedOn] < day]
 
         # nIsoBySymp = isolated[self.data[isolated, Cols.isolatedBy] == StatusType.bySymptom]
@@ -221,9 +476,7 @@ class SirModel:
         # nIsoByWatch = len(nIsoByWatch)
 
         nUnawareInfected = nInfected - len(isolated)
-        self.RunStats[StatType.nonIsolated,
-                      self.Sample,
-                      day] = nUnawareInfected
+        self.RunStats[StatType.nonIsolated, day] = nUnawareInfected
 
         # self.RunStats[self.infectedRS,
         #               self.Sample,
@@ -237,6 +490,38 @@ class SirModel:
         #               self.Sample,
         #               day] = nIsoByWatch
 
+    def KeepStatsDay(self, day):
+        # make room in RunStats for day
+        nDays = self.RunStats.shape[1]
+        if day >= nDays:
+            self.RunStats = np.pad(self.RunStats, ((0, 0), (0, max(day + 1, 2 * nDays) - nDays)))
+
+    def DayStats(self, day):
+        self.KeepStatsDay(day)
+        isolated = self.isolatedToday
+        isolated = isolated[self.data[isolated, Cols.isolatedOn] == day]
+        isoBySymptom = isolated[self.data[isolated, Cols.isolatedBy] == StatusType.bySymptom]
+        isoByWatch = isolated[self.data[isolated, Cols.isolatedBy] == StatusType.byWatch]
+
+        nonIsolated = self.NumInfected() - len(isoBySymptom) - len(isoByWatch)
+        self.RunStats[StatType.nonIsolated, day] = nonIsolated
+
+        self.RunStats[StatType.isoBySymptom, day] = len(isoBySymptom)
+
+        self.RunStats[StatType.isoByWatch, day] = len(isoByWatch)
+
+    def NumInfected(self):
+        return len(self.infected)
+
+    def NumNonInfected(self):
+        return self.cs[Ctrls.nPeeps] - len(self.infected) - len(self.recovered) - len(self.dead)
+
+    def NextDay(self, day):
+        self.StartDay(day)
+        self.Testing(day)
+        self.InfectedToRecovered(day)
+        self.SpreadInfection(day)
+
     def Testing(self, day):
         # you get a test if
         #   - your watch says you need a test
@@ -245,17 +530,9 @@ class SirModel:
         #   - you show symptoms
         #   - you are are not isolated
 
-        # find guys that have been infected
-        symptomatic = self.everyone[self.data[:, Cols.status] == StatusType.infected]
-
-        #  for at least DaysTillSymptoms
-        symptomatic = symptomatic[(day - self.data[symptomatic, Cols.dayInfec]) > self.cs[Ctrls.DaysTillSymptoms]]
-
-        # limit to the guys that will show symptoms
-        symptomatic = symptomatic[self.data[symptomatic, Cols.symptomatic] == 1]
-
-        # limit the guys that have NOT been tested recently
-        symptomatic = symptomatic[self.data[symptomatic, Cols.isolatedOn] == self.EndOfTime]
+        # infected guys showing symptoms for at least DaysTillSymptoms, and NOT tested yet:
+        # StartDay adds them on the day their symptoms show
+        symptomatic = self.testable.Items().copy()
 
         #  combine the 2 list of guys to be tested
         # needTest = np.union1d(needTest, symptomatic)
@@ -265,27 +542,22 @@ class SirModel:
             #  only get to test a certain % a day
             nTests = min(self.cs[Ctrls.nTestsPerDay], math.ceil(self.cs[Ctrls.pTest] * len(symptomatic)))
 
-            gotTest = np.random.permutation(symptomatic)
+            urand = self.Uniforms(DrawType.testOrder, symptomatic, self.SickDays(symptomatic))
+            gotTest = self.randoms.Permutation(symptomatic, urand)
             gotTest = gotTest[:int(nTests)]
 
             # some tested people may not be sick: these will test negative. Isolate only the infected
             isolated = gotTest[self.data[gotTest, Cols.status] == StatusType.infected]
 
             # mark the guys that get tested to be isolated later: in Test2Isolate days
-            self.data[isolated, Cols.isolatedBy] = StatusType.bySymptom
-            self.data[isolated, Cols.isolatedOn] = day + self.cs[Ctrls.Test2Isolate]
+            self.Isolate(isolated, day + self.cs[Ctrls.Test2Isolate], StatusType.bySymptom)
 
         # get the guys that the watch alerted to get tested
-        alertedByWatch = self.everyone[self.data[:, Cols.needTest] != 0]
-        if len(alertedByWatch) != 0:
-            x= self.data[alertedByWatch,:]
+        alertedByWatch = self.alerted.Items().copy()
 
-        self.data[alertedByWatch, Cols.isolatedBy] = StatusType.byWatch
-        self.data[alertedByWatch, Cols.isolatedOn] = day  # isolate the day after you are infected
+        self.Isolate(alertedByWatch, day, StatusType.byWatch)  # isolate the day after you are infected
 
-        self.RunStats[StatType.isoByWatch,
-                      self.Sample,
-                      day] = len(alertedByWatch)
+        self.RunStats[StatType.isoByWatch, day] = len(alertedByWatch)
 
         # print('day ', day, ' alertedByWatch: ', alertedByWatch)
 
@@ -295,92 +567,252 @@ class SirModel:
         if len(needTest) > 0:
             # print('top ', needTest)
 
-            for ii in needTest:
-                # contacts of this guy
-                contacts = self.Peeps[ii].contacts
-                self.data[contacts, Cols.needTest] += 1
-                # print('day ', day, ' contacts: ', ii, contacts)
-
-                self.Peeps[ii].contacts = []  # guy ii's contacts have been warned
+            # contacts of these guys: their contacts have been warned
+            contacts, nWarnings = self.contactLog.Notify(needTest)
+            self.data[contacts, Cols.needTest] = self.data[contacts, Cols.needTest] + nWarnings
+            self.alerted.Add(contacts)
 
             # reset the needTest flag
             self.data[needTest, Cols.needTest] = 0
-
-        isolated = self.everyone[self.data[:, Cols.status] == StatusType.infected]
-        # print('day ', day, ' total isolated: ', isolated, ' on ', self.data[isolated, Cols.isolatedOn])
-        x = 0
+            self.alerted.Remove(needTest)
 
     def InfectFamily(self, ii, day):
-        family = self.Peeps[ii].family
+        family = self.family.Row(ii)
         suscepts = family[self.data[family, Cols.status] == 0]
-        urand = np.random.sample(len(suscepts))
+        urand = self.randoms.Uniform(len(suscepts))
         newSickFamily = suscepts[urand < self.cs[Ctrls.pInfectFamily]]
 
-        self.data[newSickFamily, Cols.dayInfec] = day
-        self.data[newSickFamily, Cols.status] = StatusType.infected
+        self.Infect(newSickFamily, day)
 
         if self.data[ii, Cols.hasWatch]:
-            self.Peeps[ii].contacts = Union(self.Peeps[ii].contacts, newSickFamily)
+            self.contactLog.Append(ii, newSickFamily, day)
 
         return newSickFamily
 
     def InfectFriends(self, ii, day):
-        nFriendsToday = np.random.poisson(self.cs[Ctrls.FriendsPerDay])
-        friends = np.random.permutation(self.Peeps[ii].friends)
+        nFriendsToday = self.randoms.Poisson(self.cs[Ctrls.FriendsPerDay], 1)[0]
+        friends = self.randoms.Permutation(self.friends.Row(ii))
         friends = friends[:nFriendsToday]
 
         susceptsFriends = friends[self.data[friends, Cols.status] == 0]
-        urand = np.random.sample(len(susceptsFriends))
+        urand = self.randoms.Uniform(len(susceptsFriends))
         newSickFriends = susceptsFriends[urand < self.cs[Ctrls.pInfectFriend]]
 
-        self.data[newSickFriends, Cols.dayInfec] = day
-        self.data[newSickFriends, Cols.status] = StatusType.infected
+        self.Infect(newSickFriends, day)
 
         if self.data[ii, Cols.hasWatch]:
-            self.Peeps[ii].contacts = Union(self.Peeps[ii].contacts, newSickFriends)
+            self.contactLog.Append(ii, newSickFriends, day)
 
         return newSickFriends
 
-    def GetStrangers(self,ii):
+    def GetStrangers(self, ii):
+        # the strangers guy ii meets today: the guys of his window less his family, shuffled, less his friends
         farthestStranger = self.cs[Ctrls.StrangerRadius]
         nstrangers = self.cs[Ctrls.StgrsPerDay]
         if self.data[ii, Cols.serviceGuy]:
             farthestStranger = self.cs[Ctrls.ServStgrRadius]
             nstrangers = self.cs[Ctrls.ServStgrPerDay]
 
+        if nstrangers <= 0:
+            return np.zeros(0, dtype=np.int64)
+
+        family = self.family.Row(ii)
         belowStart = max(0, ii - farthestStranger)
-        belowEnd = max(0, self.Peeps[ii].family[0])
-        aboveStart = min(self.Peeps[ii].family[-1] + 1, self.cs[Ctrls.nPeeps] - 1)
+        belowEnd = max(0, family[0])
+        aboveStart = min(family[-1] + 1, self.cs[Ctrls.nPeeps] - 1)
         aboveEnd = min(ii + farthestStranger, self.cs[Ctrls.nPeeps] - 1)
         strangers = np.append(np.arange(belowStart, belowEnd),
                               np.arange(aboveStart, aboveEnd))
 
-        strangers = np.random.permutation(strangers)
+        strangers = self.randoms.Permutation(strangers)
         # grab nstrangers from the stranger list
-        stgrs = np.arange(nstrangers)
+        stgrs = np.zeros(nstrangers, dtype=np.int64)
         nFound = 0
-        friendSet = set(self.Peeps[ii].friends)
-        for istgr in strangers:
+        friendSet = set(self.friends.Row(ii).tolist())
+        for istgr in strangers.tolist():
             if istgr not in friendSet:
                 stgrs[nFound] = istgr
                 nFound += 1
                 if nFound == nstrangers:
                     break
 
-        return stgrs
+        return stgrs[:nFound]
 
     def SpreadInfection(self, day):
+        if self.spreadMode == SpreadMode.loop:
+            self.SpreadInfectionLoop(day)
+        else:
+            self.SpreadInfectionBatch(day)
+
+    def Spreaders(self, day):
+        infected = self.infected.Items().copy()
+        return infected[~self.isolated.Contains(infected)]  # and not isolated
+
+    def BatchFamily(self, spreaders):
+        # every family member of every spreader: (index into spreaders, guy)
+        return self.family.Gather(spreaders)
+
+    def BatchFriends(self, spreaders):
+        # the friends each spreader meets today: poisson(FriendsPerDay) of their friends
+        owner, friends = self.friends.Gather(spreaders)
+
+        sickDays = self.SickDays(spreaders)
+        nFriendsToday = self.randoms.Poisson(self.cs[Ctrls.FriendsPerDay], len(spreaders),
+                                             self.Uniforms(DrawType.friendsToday, spreaders, sickDays))
+        urand = self.Uniforms(DrawType.friendPick, spreaders[owner], friends, sickDays[owner])
+        kept = GroupedChoice(owner, len(spreaders), nFriendsToday, urand)
+        kept.sort()
+        return owner[kept], friends[kept]
+
+    def SampleStrangers(self, spreaders):
+        # StgrsPerDay different strangers for every spreader, ServStgrPerDay for service guys, picked from the
+        # StrangerRadius (ServStgrRadius) guys either side less the family and friends.
+        # returns (index into spreaders, stranger)
+        nPeeps = self.cs[Ctrls.nPeeps]
+        spreaders = np.asarray(spreaders, dtype=np.int64)
+        nSpreaders = len(spreaders)
+        service = self.data[spreaders, Cols.serviceGuy] == 1
+        farthest = np.where(service, self.cs[Ctrls.ServStgrRadius], self.cs[Ctrls.StrangerRadius])
+        nStrangers = np.where(service, self.cs[Ctrls.ServStgrPerDay], self.cs[Ctrls.StgrsPerDay])
+
+        # the window is [belowStart, family) + [aboveStart, aboveStart + aboveLen)
+        belowStart = np.maximum(0, spreaders - farthest)
+        belowLen = np.maximum(self.family.First(spreaders) - belowStart, 0)
+        aboveStart = np.minimum(self.family.Last(spreaders) + 1, nPeeps - 1)
+        aboveLen = np.maximum(np.minimum(spreaders + farthest, nPeeps - 1) - aboveStart, 0)
+        window = belowLen + aboveLen
+
+        # friends inside the window can not be strangers
+        friendOwner, friends = self.friends.Gather(spreaders)
+        inWindow = ((friends >= belowStart[friendOwner]) & (friends < belowStart[friendOwner] + belowLen[friendOwner])) | \
+                   ((friends >= aboveStart[friendOwner]) & (friends < aboveStart[friendOwner] + aboveLen[friendOwner]))
+        nFree = window - np.bincount(friendOwner[inWindow], minlength=nSpreaders)
+        need = np.minimum(nStrangers, nFree)
+
+        # crowded windows: list every free guy and pick from them
+        crowded = np.flatnonzero((need > 0) & (2 * need > nFree))
+        belowOwner, below = GroupedRanges(belowStart[crowded], belowStart[crowded] + belowLen[crowded])
+        aboveOwner, above = GroupedRanges(aboveStart[crowded], aboveStart[crowded] + aboveLen[crowded])
+        crowdOwner = crowded[np.concatenate((belowOwner, aboveOwner))]
+        crowd = np.concatenate((below, above))
+        free = ~self.friends.Contains(spreaders[crowdOwner], crowd)
+        crowdOwner, crowd = crowdOwner[free], crowd[free]
+        sickDays = self.SickDays(spreaders)
+        urand = self.Uniforms(DrawType.crowdPick, spreaders[crowdOwner], crowd, sickDays[crowdOwner])
+        picked = GroupedChoice(crowdOwner, nSpreaders, need, urand)
+        crowdOwner, crowd = crowdOwner[picked], crowd[picked]
+
+        # roomy windows: draw, and draw again for the draws that hit a friend or a stranger already picked.
+        # at least half of every window is free, so a few rounds fill them all
+        deficit = need.copy()
+        deficit[crowded] = 0
+        keys = np.zeros(0, dtype=np.int64)  # spreader * nPeeps + stranger
+        nDrawn = np.zeros(nSpreaders, dtype=np.int64)  # the draws for each spreader so far: they number the next ones
+        while deficit.sum() > 0:
+            who = np.repeat(np.arange(nSpreaders), deficit)
+            nth = nDrawn[who] + np.arange(who.size) - (np.cumsum(deficit) - deficit)[who]
+            nDrawn += deficit
+            urand = self.Uniforms(DrawType.strangerDraw, spreaders[who], nth, sickDays[who])
+            offset = np.floor(urand * window[who]).astype(np.int64)
+            stgrs = np.where(offset < belowLen[who], belowStart[who] + offset, aboveStart[who] + offset - belowLen[who])
+            newKeys = who * nPeeps + stgrs
+
+            allKeys = np.concatenate((keys, newKeys))
+            _, firsts = np.unique(allKeys, return_index=True)
+            isFirst = np.zeros(allKeys.size, dtype=bool)
+            isFirst[firsts] = True
+            ok = isFirst[keys.size:] & ~self.friends.Contains(spreaders[who], stgrs)
+
+            keys = np.concatenate((keys, newKeys[ok]))
+            deficit -= np.bincount(who[ok], minlength=nSpreaders)
+
+        return np.concatenate((crowdOwner, keys // nPeeps)), np.concatenate((crowd, keys % nPeeps))
+
+    def BuildStructure(self, popRng):
+        # the part of a population that only depends on the structural controls and popRng:
+        # named like the arrays of a checkpoint
+        nPeeps = self.cs[Ctrls.nPeeps]
+        chunk = self.store.chunk
+        structure = {}
+
+        # create the families: i.e. list of adjacent people, and their friends
+        famStart, famEnd = MakeFamilies(self.cs, popRng)
+        family = AdjacencyType.FromBlocks(famStart, famEnd, self.store, 'family')
+        friends = MakeFriends(family, self.cs, popRng, self.store)
+        for name, adjacency in (('family', family), ('friends', friends)):
+            structure[name + '.indptr'] = adjacency.indptr
+            structure[name + '.indices'] = adjacency.indices
+
+        column = self.store.Zeros('data.family', nPeeps, PopulationType.dtypes[Cols.family])
+        for first in range(0, len(famStart), chunk):
+            starts, ends = famStart[first:first + chunk], famEnd[first:first + chunk]
+            column[starts[0]:ends[-1]] = np.repeat(starts, ends - starts)
+        structure['data.family'] = column
+
+        #  pick the guys who will show symptoms, who work in service industry and who have a watch
+        for col, ctrl in ((Cols.symptomatic, Ctrls.pShowSymptoms),
+                          (Cols.serviceGuy, Ctrls.pServiceGuy),
+                          (Cols.hasWatch, Ctrls.pHaveWatch)):
+            column = self.store.Zeros('data.' + col.name, nPeeps, PopulationType.dtypes[col])
+            PickGuys(column, math.floor(nPeeps * self.cs[ctrl]), popRng, chunk)
+            structure['data.' + col.name] = column
+
+        return structure
+
+    def SpreadInfectionBatch(self, day):
+        self.newInfected = 0
+
+        # lots of spreaders go a chunk at a time, in guy order, so each pass reads nearby pages of the population.
+        # a guy infected by an earlier chunk is no longer susceptible to the later ones
+        spreaders = self.Spreaders(day)
+        if len(spreaders) > self.spreadChunk:
+            spreaders.sort()
+        for first in range(0, len(spreaders), self.spreadChunk):
+            self.SpreadChunk(spreaders[first:first + self.spreadChunk], day)
+
+        self.RunStats[StatType.infected, day] = self.newInfected
+
+        self.TotalInfected += self.newInfected
+
+    def SpreadChunk(self, spreaders, day):
+        famOwner, family = self.BatchFamily(spreaders)
+        friendOwner, friends = self.BatchFriends(spreaders)
+        stgrOwner, strangers = self.SampleStrangers(spreaders)
+
+        # every contact of the day with its infection probability
+        owner = np.concatenate((famOwner, friendOwner, stgrOwner))
+        contacts = np.concatenate((family, friends, strangers))
+        pInfect = np.concatenate((np.full(family.size, self.cs[Ctrls.pInfectFamily]),
+                                  np.full(friends.size, self.cs[Ctrls.pInfectFriend]),
+                                  np.full(strangers.size, self.cs[Ctrls.pInfectStgr])))
+
+        suscept = self.data[contacts, Cols.status] == StatusType.nonInfected
+        owner, contacts, pInfect = owner[suscept], contacts[suscept], pInfect[suscept]
+
+        infects = self.Uniforms(DrawType.infects, spreaders[owner], contacts, self.SickDays(spreaders[owner])) < pInfect
+        owner, contacts = owner[infects], contacts[infects]
+
+        # watch wearers remember who they infected
+        watchers = self.data[spreaders[owner], Cols.hasWatch] == 1
+        self.contactLog.Append(spreaders[owner[watchers]], contacts[watchers], day)
+
+        newSick = np.unique(contacts)
+        self.Infect(newSick, day)
+        self.newInfected += len(newSick)
+
+    def SpreadInfectionLoop(self, day):
+        # each spreader meets his family, friends and strangers the way the first model had them meet, one guy
+        # after the other. the status sets, the calendar and the contact log are the ones the batch mode keeps
         self.newInfected = 0
 
-        infected = self.everyone[self.data[:, Cols.status] == StatusType.infected]
-        infected = infected[self.data[infected, Cols.isolatedOn] > day]  # and not isolated
+        infected = self.Spreaders(day)
 
         # print('day ', day, ' inf ! iso: ', infected, ' on ', self.data[infected, Cols.isolatedOn])
 
         if len(infected) == 0:
             return
 
-        for ii in np.nditer(infected):
+        for ii in infected:
             # infect family
             newSickFamily = self.InfectFamily(ii, day)
 
@@ -391,29 +823,30 @@ class SirModel:
             strangers = self.GetStrangers(ii)
 
             suscepts2 = strangers[self.data[strangers, Cols.status] == 0]
-            urand2 = np.random.sample(len(suscepts2))
+            urand2 = self.randoms.Uniform(len(suscepts2))
             newSickStgr = suscepts2[urand2 < self.cs[Ctrls.pInfectStgr]]
 
             if self.data[ii, Cols.hasWatch]:
-                self.Peeps[ii].contacts = Union(self.Peeps[ii].contacts, newSickStgr)
+                self.contactLog.Append(ii, newSickStgr, day)
 
             newII = len(newSickFamily) + len(newSickFriends) + len(newSickStgr)
             self.newInfected = self.newInfected + newII
 
-            self.data[newSickStgr, Cols.dayInfec] = day
-            self.data[newSickStgr, Cols.status] = StatusType.infected
+            self.Infect(newSickStgr, day)
 
-        self.RunStats[StatType.infected,
-                      self.Sample,
-                      day] = self.newInfected
+        self.RunStats[StatType.infected, day] = self.newInfected
 
         self.TotalInfected += self.newInfected
 
-    def Reset(self):
-        if self.ResetStats:    # user clicked or max num samples reached
+    def Reset(self, stream=None):
+        if self.ResetStats:    # user clicked
             self.ResetStats = False
             self.Sample = -1
-            self.RunStats.fill(0)  # 3 types of stats, 20 samples, 150 days
+            self.Stats.Clear()
+        elif self.Sample >= 0:  # the sample that ran up to now joins the ensemble
+            self.Stats.Add(self.RunStats[:, :self.day + 1])
+
+        self.RunStats.fill(0)
 
         # if self.ctrlsChanged:
         #     self.ctrlsChanged = False
@@ -425,68 +858,64 @@ class SirModel:
         self.Sample += 1
         self.SetCntrls()
 
-        self.everyone = np.arange(self.cs[Ctrls.nPeeps])
+        # the population and the days that follow get their own streams
+        self.Stream = self.Sample if stream is None else stream
+        popSeed, daySeed = SampleSeed(self.Seed, self.Stream).spawn(2)
+        popRng = np.random.default_rng(popSeed)
+        self.rng = np.random.default_rng(daySeed)
+        self.randoms = RandomPoolType(self.rng, daySeed.generate_state(1, np.uint64)[0])
+
+        # the arrays of the last population go: a chunk of guys at a time from here, it may be in files
+        nPeeps = self.cs[Ctrls.nPeeps]
+        chunk = self.store.chunk
+        self.store.Release()
+
+        # the families, friends and flags: the same ones as a cached population of the same key
+        # a population built in files of the store only goes to the cache's folder: the store deletes them
+        key = StructureKey(self.cs, self.Seed, self.Stream)
+        structure = self.populations.Get(key) if self.populations is not None else None
+        if structure is None:
+            structure = self.BuildStructure(popRng)
+            if self.populations is not None:
+                self.populations.Put(key, structure, keep=not self.store.folder)
+
+        self.family = AdjacencyType(structure['family.indptr'], structure['family.indices'])
+        self.friends = AdjacencyType(structure['friends.indptr'], structure['friends.indices'])
 
         self.sipEndDay = self.EndOfTime
-        self.data = np.zeros((self.cs[Ctrls.nPeeps], Cols.lastDataCol))
+        self.data = PopulationType(nPeeps, store=self.store, structure=structure)
+        self.infected = IndexSetType(nPeeps, self.store, 'infected')
+        self.recovered = IndexSetType(nPeeps, self.store, 'recovered')
+        self.dead = IndexSetType(nPeeps, self.store, 'dead')
+        self.isolated = IndexSetType(nPeeps, self.store, 'isolated')
+        self.alerted = IndexSetType(nPeeps, self.store, 'alerted')
+        self.testable = IndexSetType(nPeeps, self.store, 'testable')
+        self.isolatedToday = np.zeros(0, dtype=np.int64)
+        self.calendar.Clear()
+        self.day = 0
 
         #  INITIAL infected guys
-        infected = list(range(1000, self.cs[Ctrls.nPeeps], 1000))
+        infected = list(range(1000, nPeeps, 1000))
 
-        self.RunStats[StatType.infected,
-                      self.Sample,
-                      0] = len(infected)
+        self.RunStats[StatType.infected, 0] = len(infected)
 
         self.TotalInfected = len(infected)
 
         self.newInfected = 0
-
-        self.data[infected, Cols.status] = StatusType.infected
-        self.data[infected, Cols.dayInfec] = 0
-
-        # create the families: i.e. list of adjacent people
-        self.Peeps = [0] * self.cs[Ctrls.nPeeps]
-        nextPeep = 0
-        while True:
-            npeep = np.random.poisson(self.cs[Ctrls.nInFamily]) + 1
-            lastPeep = min(self.cs[Ctrls.nPeeps], nextPeep + npeep)
-            family = np.arange(nextPeep, lastPeep)
-            for id in family:
-                self.Peeps[id] = PeepType()
-                self.Peeps[id].SetFamily(id, family)
-                self.Peeps[id].MakeFriends(self.cs)
-                self.Peeps[id].contacts = []
-
-            nextPeep += npeep
-            if nextPeep > self.cs[Ctrls.nPeeps]:
-                break
-
-        #  pick the guys who will show symptoms
-        symptomatics = np.random.permutation(self.everyone)
-        symptomatics = symptomatics[:math.floor(self.cs[Ctrls.nPeeps] * self.cs[Ctrls.pShowSymptoms])]
-        self.data[symptomatics, Cols.symptomatic] = 1
-
-        #  pick the guys who work in service industry
-        self.serviceGuys = np.random.permutation(self.everyone)
-        self.serviceGuys = self.serviceGuys[:math.floor(self.cs[Ctrls.nPeeps] * self.cs[Ctrls.pServiceGuy])]
-        self.data[self.serviceGuys, Cols.serviceGuy] = 1
-
-        # nonServiceGuys guys, the general public
-        self.nonServiceGuys = np.nonzero(self.data[:, Cols.serviceGuy] == 0)
+        self.nRecoveredOrDead = 0
+        self.contactLog.Clear()
 
         # set the isolate day to a big number
-        self.data[:, Cols.isolatedOn] = self.EndOfTime
+        column = self.data.columns[Cols.isolatedOn]
+        for first in range(0, nPeeps, chunk):
+            column[first:first + chunk] = self.EndOfTime
 
-        # guys with a watch
-        watchers = np.random.permutation(self.everyone)
-        nWatches = math.floor(self.cs[Ctrls.pHaveWatch] * self.cs[Ctrls.nPeeps])
-        watchers = watchers[: nWatches]
-        self.data[watchers, Cols.hasWatch] = 1
+        # the first guys get sick once everyone is in place
+        self.Infect(np.array(infected, dtype=int), 0)
 
         width = 11
         hgt = 3
         nCols = round((math.sqrt(self.cs[Ctrls.nPeeps] / hgt / width) * width))
         nRows = math.ceil(self.cs[Ctrls.nPeeps] / nCols)
 
-        self.data[:, Cols.xPos] = np.mod(self.everyone, nCols)
-        self.data[:, Cols.yPos] = np.floor(np.divide(self.everyone, nCols))
+        self.data.gridCols = nCols
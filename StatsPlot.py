@@ -5,7 +5,8 @@ from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg, \
     NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
 
-from SirModel import Cols, Ctrls, StatType, StatusType
+from EnsembleStats import PadDays
+from SirModel import Ctrls, StatType
 
 
 class MplCanvas(FigureCanvasQTAgg):
@@ -85,14 +86,7 @@ class StatsPlot(QtWidgets.QWidget):
         self.verticalLayout_2.addWidget(toolbar)
         self.verticalLayout_2.addWidget(self.canvas)
 
-        x = np.linspace(0, 10)
-        self.canvas.axes.plot(x, np.sin(x) + x + np.random.randn(50))
-        self.canvas.axes.plot(x, np.sin(x) + 0.5 * x + np.random.randn(50))
-        self.canvas.axes.plot(x, np.sin(x) + 2 * x + np.random.randn(50))
-        self.canvas.axes.plot(x, np.sin(x) - 0.5 * x + np.random.randn(50))
-        self.canvas.axes.plot(x, np.sin(x) - 2 * x + np.random.randn(50))
-        self.canvas.axes.plot(x, np.sin(x) + np.random.randn(50))
-        self.canvas.axes.set_title("filler plot")
+        self.SetupAxes()
 
         QtCore.QMetaObject.connectSlotsByName(self)
 
@@ -113,85 +107,102 @@ class StatsPlot(QtWidgets.QWidget):
         self.grab().save(name)
         return
 
-    def Update(self, day):
-        self.setWindowTitle('Multi-run stats- ' + self.SirModel.SceneTitle)
+    def SetupAxes(self):
+        # the lines stay: each update sets their data and blits them over the saved background
+        self.canvas.axes.set_xlabel('day')
+        self.canvas.axes.set_ylabel('Cumulative Counts')
+        self.canvas.axes.grid(True)
 
-        isolated = self.SirModel.everyone[self.SirModel.data[:, Cols.isolatedOn] == day]
-        isoBySymptom = isolated[self.SirModel.data[isolated, Cols.isolatedBy] == StatusType.bySymptom]
-        isoByWatch = isolated[self.SirModel.data[isolated, Cols.isolatedBy] == StatusType.byWatch]
+        self.ax2.set_ylabel('Cum Non-isolated')
+        self.ax2.yaxis.label.set_color('b')
+        self.ax2.tick_params(axis='y', colors='b')
 
-        infected = self.SirModel.everyone[self.SirModel.data[:, Cols.status] == StatusType.infected]
+        self.lines = {}
+        lns = self.canvas.axes.plot([], [], 'r', label='<- infected', animated=True)
+        lns += self.canvas.axes.plot([], [], 'y', label='<- iso by symp', animated=True)
+        lns += self.canvas.axes.plot([], [], 'm', label='<- iso by watch', animated=True)
+        lns += self.ax2.plot([], [], color='b', linewidth='.5', label='non-iso ->', animated=True)
+        for stat, line in zip([StatType.infected, StatType.isoBySymptom, StatType.isoByWatch, StatType.nonIsolated], lns):
+            self.lines[stat] = line
 
-        nonIsolated = len(infected) - len(isoBySymptom) - len(isoByWatch)
-        self.SirModel.RunStats[StatType.nonIsolated,
-                               self.SirModel.Sample,
-                               day] = nonIsolated
+        lbls = [line.get_label() for line in lns]
+        self.canvas.axes.legend(lns, lbls)
 
-        self.SirModel.RunStats[StatType.isoBySymptom,
-                      self.SirModel.Sample,
-                      day] = len(isoBySymptom)
+        self.nDays = 200  # days on the x axis: doubles when a sample runs past it
+        self.summary = None  # the day on the plot
+        self.stats = None  # the ensemble stats in storedMean
+        self.storedMean = None  # mean cumulative counts of the finished samples
 
-        self.SirModel.RunStats[StatType.isoByWatch,
-                      self.SirModel.Sample,
-                      day] = len(isoByWatch)
+        self.background = None
+        self.canvas.mpl_connect('draw_event', self.OnDraw)
 
-        if day % 10 != 0:
-            return
+    def OnDraw(self, event):
+        # a full draw: keep the background without the lines, then put the lines on it
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        for line in self.lines.values():
+            line.axes.draw_artist(line)
 
-        day = 200
+    def Update(self, summary):
+        # summary: a SimRunner.DaySummaryType
+        self.setWindowTitle('Multi-run stats- ' + summary.sceneTitle)
+
+        if not self.SetLines(summary) or self.background is None:
+            self.Redraw(summary)
+            return
 
+        self.canvas.restore_region(self.background)
+        for line in self.lines.values():
+            line.axes.draw_artist(line)
+        self.canvas.blit(self.canvas.figure.bbox)
+
+    def SetLines(self, summary):
+        # new data for the lines that changed: False if they no longer fit in the axes
+        self.summary = summary
+        stats = summary.stats
+        nStored = len(stats)
+        while summary.day >= self.nDays or stats.nDays > self.nDays:
+            self.nDays *= 2
+            self.stats = None
+
+        # the finished samples only change when a sample ends, the running one only from today on
+        if stats is not self.stats:
+            self.stats = stats
+            self.storedMean = stats.Mean(self.nDays + 1, cumulative=True)
+
+        current = np.cumsum(PadDays(summary.runStats, self.nDays + 1), axis=1)
+        mean = (nStored * self.storedMean + current) / (nStored + 1)
+
+        days = np.arange(0, self.nDays + 1)
+        fits = True
+        for stat, line in self.lines.items():
+            if line.get_xdata().size == days.size and np.array_equal(line.get_ydata(), mean[stat]):
+                continue
+
+            line.set_data(days, mean[stat])
+            fits &= mean[stat].max() <= line.axes.get_ylim()[1]
+
+        fits &= self.canvas.axes.get_xlim()[1] >= self.nDays
+        return fits
+
+    def Redraw(self, summary=None):
         #  make sure the latest controls are on the screen
         ctrlValues = [ctrl.text() for ctrl in self.controls]
         ctrlValues = '\n'.join(ctrlValues)
         self.ctrlValues.setText(ctrlValues)
 
-        infected = self.SirModel.RunStats[
-                   StatType.infected,
-                   0: self.SirModel.Sample + 1,
-                   0:day + 1]
-
-        infected = np.cumsum(infected, axis=1)
-        infected = np.mean(infected, axis=0)
-
-        isoBySym = self.SirModel.RunStats[
-                   StatType.isoBySymptom,
-                   0: self.SirModel.Sample + 1,
-                   0:day + 1]
-        isoBySym = np.cumsum(isoBySym, axis=1)
-        isoBySym = np.mean(isoBySym, axis=0)
-
-        isoByWatch = self.SirModel.RunStats[
-                   StatType.isoByWatch,
-                   0: self.SirModel.Sample + 1,
-                   0:day + 1]
-        isoByWatch = np.cumsum(isoByWatch, axis=1)
-        isoByWatch = np.mean(isoByWatch, axis=0)
-
-        nonIsolated = self.SirModel.RunStats[
-                   StatType.nonIsolated,
-                   0: self.SirModel.Sample + 1,
-                   0:day + 1]
-        nonIsolated = np.cumsum(nonIsolated, axis=1)
-        nonIsolated = np.mean(nonIsolated, axis=0)
-
-        days = np.arange(0, day + 1)
-        self.canvas.axes.cla()
-        self.canvas.axes.set_xlabel('day')
-        self.canvas.axes.set_ylabel('Cumulative Counts')
-        self.canvas.axes.grid(True)
-
-        self.ax2.cla()
-        self.ax2.set_ylabel('Cum Non-isolated')
-        self.ax2.yaxis.label.set_color('b')
-        self.ax2.tick_params(axis='y', colors='b')
+        summary = summary or self.summary
+        if summary is None:
+            self.canvas.draw()
+            return
 
-        lns = self.canvas.axes.plot(days, infected[:], 'r', label='<- infected')
-        lns += self.canvas.axes.plot(days, isoBySym[:], 'y', label='<- iso by symp')
-        lns += self.canvas.axes.plot(days, isoByWatch[:], 'm', label='<- iso by watch')
-        lns += self.ax2.plot(days, nonIsolated[:], color='b', linewidth='.5', label='non-iso ->')
+        self.stats = None
+        self.SetLines(summary)
 
-        lbls = [line.get_label() for line in lns]
-        self.canvas.axes.legend(lns, lbls)
+        # room for the lines to grow before the next full draw
+        self.canvas.axes.set_xlim(0, self.nDays)
+        for axes in (self.canvas.axes, self.ax2):
+            top = max(line.get_ydata().max() for line in self.lines.values() if line.axes is axes)
+            axes.set_ylim(0, 1.25 * top if top > 0 else 1)
 
         self.canvas.draw()
 
@@ -0,0 +1,244 @@
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from statistics import NormalDist
+
+import numpy as np
+
+from Ensemble import RunOneSample, Outcomes, OutcomeType
+from PopulationCache import WorkerShare
+from ResultCache import ResultCacheType, ResultKey
+from Scenario import ControlsTable
+from SirModel import SirModel, Ctrls, ControlsType
+
+
+# the controls that count guys or days: the model takes them as whole numbers.
+# nInFamily and FriendsPerDay are the means of Poisson draws, so they need not be
+countCtrls = (Ctrls.nPeeps, Ctrls.minDaysSick, Ctrls.nFriends, Ctrls.FriendRadius,
+              Ctrls.StgrsPerDay, Ctrls.StrangerRadius, Ctrls.ServStgrPerDay, Ctrls.ServStgrRadius,
+              Ctrls.DaysTillSymptoms, Ctrls.nTestsPerDay, Ctrls.Test2Isolate)
+
+
+class VaryType:  # a control a sweep varies, from low to high
+    dists = ('uniform', 'log', 'normal')  # how the values spread between low and high
+
+    def __init__(self, ctrl, low, high, nSteps=None, dist='uniform'):
+        # log: uniform in the log of the value, for controls that span orders of magnitude. low must be above 0.
+        # normal: low to high is the middle 95% of a normal distribution, cut to the values the control can take
+        if dist not in self.dists:
+            raise ValueError("'" + dist + "' is not one of " + ', '.join(self.dists))
+        if dist == 'log' and not 0 < low <= high:
+            raise ValueError('a log range must have 0 < low <= high')
+
+        self.ctrl = Ctrls(ctrl)
+        self.low = low
+        self.high = high
+        self.nSteps = nSteps  # the steps of a grid: None for the grid's default
+        self.dist = dist
+
+    @classmethod
+    def Parse(cls, text):
+        # 'name=low:high[:steps][@dist]', e.g. 'pInfectStgr=0.005:0.05:40' or 'pInfectStgr=0.001:0.1@log'
+        name, _, span = text.partition('=')
+        span, _, dist = span.partition('@')
+        parts = span.split(':')
+        if name not in Ctrls.__members__ or name == 'LastCtrl' or len(parts) not in (2, 3):
+            raise ValueError("'" + text + "' is not name=low:high[:steps][@dist] of a control")
+
+        return cls(Ctrls[name], float(parts[0]), float(parts[1]), int(parts[2]) if len(parts) == 3 else None,
+                   dist or 'uniform')
+
+    def IsCount(self):
+        return self.ctrl in countCtrls
+
+    def At(self, fraction):
+        # the values at a fraction of the way through the distribution: its quantiles
+        fraction = np.asarray(fraction, dtype=float)
+        if self.dist == 'log':
+            values = np.exp(np.log(self.low) + fraction * (np.log(self.high) - np.log(self.low)))
+        elif self.dist == 'normal':
+            normal = NormalDist((self.low + self.high) / 2, (self.high - self.low) / (2 * NormalDist().inv_cdf(0.975)))
+            fraction = np.clip(fraction, 1e-9, 1 - 1e-9)
+            values = np.reshape([normal.inv_cdf(f) for f in fraction.reshape(-1)], fraction.shape)
+            values = np.clip(values, 0, 1 if self.ctrl.name.startswith('p') else None)
+        else:
+            values = self.low + fraction * (self.high - self.low)
+
+        return np.round(values) if self.IsCount() else values
+
+    def Steps(self, nSteps):
+        # low and high and the steps between them, or for a normal the middles of nSteps equally likely slices
+        nSteps = self.nSteps or nSteps
+        if self.dist == 'normal':
+            return np.unique(self.At((np.arange(nSteps) + 0.5) / nSteps))
+
+        return np.unique(self.At(np.linspace(0, 1, nSteps)))
+
+
+def GridDesign(varies, nPoints, rng):
+    # every combination of the steps of each control: about nPoints in all, unless the steps are given
+    nSteps = max(2, round(nPoints ** (1 / len(varies))))
+    steps = [vary.Steps(nSteps) for vary in varies]
+    return np.array(list(itertools.product(*steps)), dtype=float).reshape(-1, len(varies))
+
+
+def LatinHypercube(varies, nPoints, rng):
+    # each control's range cut into nPoints strata, each used once: the strata of the controls are paired at random
+    strata = np.argsort(rng.random((len(varies), nPoints)), axis=1)
+    fractions = (strata + rng.random((len(varies), nPoints))) / nPoints
+    return np.column_stack([vary.At(fractions[n]) for n, vary in enumerate(varies)])
+
+
+def RandomDesign(varies, nPoints, rng):
+    fractions = rng.random((len(varies), nPoints))
+    return np.column_stack([vary.At(fractions[n]) for n, vary in enumerate(varies)])
+
+
+designs = {'grid': GridDesign, 'lhs': LatinHypercube, 'random': RandomDesign}
+
+
+def PointControls(base, varies, values):
+    controls = base.Copy()
+    for vary, value in zip(varies, values):
+        controls[vary.ctrl] = int(value) if vary.IsCount() else float(value)
+
+    return controls
+
+
+class SweepTableType:  # the outcomes of a sweep: one row per point and sample, in that order
+    def __init__(self, varies, nPoints, nSamples):
+        self.nPoints = nPoints
+        self.nSamples = nSamples
+        self.columns = ['point', 'sample'] + [vary.ctrl.name for vary in varies] + \
+                       [OutcomeType(n).name for n in range(OutcomeType.lastOutcome)]
+        self.firstOutcome = 2 + len(varies)
+        self.rows = np.full((nPoints * nSamples, len(self.columns)), np.nan)
+
+    def Row(self, point, sample):
+        return point * self.nSamples + sample
+
+    def SetPoint(self, point, values):
+        rows = slice(self.Row(point, 0), self.Row(point + 1, 0))
+        self.rows[rows, 0] = point
+        self.rows[rows, 1] = np.arange(self.nSamples)
+        self.rows[rows, 2:self.firstOutcome] = values
+
+    def SetOutcomes(self, point, sample, outcomes):
+        self.rows[self.Row(point, sample), self.firstOutcome:] = outcomes
+
+    def Column(self, name):
+        return self.rows[:, self.columns.index(name)]
+
+    def Means(self):
+        # nPoints x columns: the mean over the samples of each point
+        return self.rows.reshape(self.nPoints, self.nSamples, -1).mean(axis=1)
+
+    def Save(self, fileName):
+        with open(fileName, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(self.columns)
+            for row in self.rows:
+                writer.writerow(['{:.10g}'.format(x) for x in row])
+
+
+def RunSweep(base, varies, points, nSamples, nDays=200, nWorkers=None, seed=None, folder=None, popCache=None,
+             results=None, report=None, paired=False):
+    # nSamples of every point of a design. sample k of each point runs on stream k of the seed, so the points
+    # differ only in their controls, and share the populations they build.
+    # each sample is a task of its own: a worker takes the next one as soon as it is free, so the long and the
+    # short samples even out over the cores.  report(done, total) is called as the samples finish.
+    # paired: the samples draw SirModel's keyed uniforms, so neighbouring points differ by less noise
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+
+    table = SweepTableType(varies, len(points), nSamples)
+    tasks = {}
+    for point, values in enumerate(points):
+        table.SetPoint(point, values)
+        controls = PointControls(base, varies, values)
+        for sample in range(nSamples):
+            key = ResultKey(controls, None, seed, sample, nDays, paired) if results else None
+            stats = results.Get(key) if results else None
+            if stats is None:
+                tasks[(point, sample)] = ((controls, None, nDays, seed, sample, folder, popCache, paired), key)
+            else:
+                table.SetOutcomes(point, sample, Outcomes(stats))
+
+    total = len(points) * nSamples
+    done = total - len(tasks)
+    if not tasks:
+        return table
+
+    nWorkers = min(nWorkers or os.cpu_count(), len(tasks))
+    with ProcessPoolExecutor(max_workers=nWorkers, initializer=WorkerShare, initargs=(nWorkers,)) as pool:
+        futures = {pool.submit(RunOneSample, task): (where, key) for where, (task, key) in tasks.items()}
+        for future in as_completed(futures):
+            (point, sample), key = futures[future]
+            stats = future.result()
+            if results:
+                results.Put(key, stats)
+
+            table.SetOutcomes(point, sample, Outcomes(stats))
+            done += 1
+            if report:
+                report(done, total)
+
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sweep the SIR model over ranges of its controls')
+    parser.add_argument('vary', nargs='+', metavar='name=low:high[:steps][@dist]',
+                        help='a control to vary and its range. dist is uniform (default), log: uniform in the log, '
+                             'or normal: low to high is the middle 95%%')
+    parser.add_argument('--controls', default=None, help="a controls csv, as written by 'Save Controls'")
+    parser.add_argument('-b', '--base', default=None,
+                        help='the column of --controls the other controls come from (default: the defaults)')
+    parser.add_argument('--design', choices=sorted(designs), default='grid', help='how the points are picked')
+    parser.add_argument('-p', '--points', type=int, default=100, help='points in the design, about for a grid')
+    parser.add_argument('-n', '--samples', type=int, default=4, help='samples per point')
+    parser.add_argument('-d', '--days', type=int, default=200, help='last day of each sample')
+    parser.add_argument('-j', '--workers', type=int, default=0, help='worker processes, 0 for one per core')
+    parser.add_argument('-s', '--seed', type=int, default=None, help='root seed: sample k runs on stream k of it')
+    parser.add_argument('-c', '--cache', default='ResultCache', metavar='FOLDER',
+                        help="finished samples are kept in FOLDER and not run again: '' to run every sample")
+    parser.add_argument('--paired', action='store_true',
+                        help='common random numbers: the points differ by less noise, see Compare.py')
+    parser.add_argument('-o', '--out', default='Sweep.csv', help='the results table')
+    args = parser.parse_args(argv)
+    if args.days > SirModel.lastDay:
+        parser.error('--days goes up to {}'.format(SirModel.lastDay))
+
+    try:
+        varies = [VaryType.Parse(text) for text in args.vary]
+    except ValueError as error:
+        parser.error(str(error))
+    base = ControlsType()
+    if args.base:
+        if not args.controls:
+            parser.error('--base needs --controls')
+        base = ControlsTable.Load(args.controls).Controls(args.base)
+
+    seed = args.seed if args.seed is not None else np.random.SeedSequence().entropy
+    print('seed:', seed)
+    points = designs[args.design](varies, args.points, np.random.default_rng(seed))
+    results = ResultCacheType(args.cache) if args.cache else None
+
+    start = time.time()
+    step = max(1, len(points) * args.samples // 20)
+
+    def Report(done, total):
+        if done % step == 0 or done == total:
+            print('{} of {} samples, {:.0f} s'.format(done, total, time.time() - start))
+
+    table = RunSweep(base, varies, points, args.samples, args.days, args.workers or None, seed,
+                     results=results, report=Report, paired=args.paired)
+    table.Save(args.out)
+    print('{} points x {} samples in {:.1f} s: {}'.format(len(points), args.samples, time.time() - start, args.out))
+
+
+if __name__ == "__main__":
+    main()
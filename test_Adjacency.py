@@ -0,0 +1,28 @@
+import unittest
+
+import numpy as np
+
+from Adjacency import AdjacencyType
+
+
+class AdjacencyTest(unittest.TestCase):
+    def test_contains(self):
+        rng = np.random.default_rng(3)
+        lists = [np.unique(rng.integers(0, 100, rng.integers(0, 12))) for _ in range(100)]
+        adjacency = AdjacencyType.FromLists(lists)
+        rows = rng.integers(0, 100, 5000)
+        ids = rng.integers(0, 100, 5000)
+        expected = np.array([ids[j] in set(lists[rows[j]].tolist()) for j in range(len(rows))])
+        self.assertTrue(np.array_equal(adjacency.Contains(rows, ids), expected))
+
+    def test_rows(self):
+        # each row is its list, in order, and empty lists give empty rows
+        rng = np.random.default_rng(11)
+        lists = [np.sort(rng.integers(0, 100, rng.integers(0, 12))) for _ in range(100)]
+        adjacency = AdjacencyType.FromLists(lists)
+        for ii, row in enumerate(lists):
+            self.assertTrue(np.array_equal(adjacency.Row(ii), row))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from Checkpoint import SaveCheckpoint, LoadCheckpoint
+from SirModel import SirModel, ControlsType, Ctrls
+
+
+def SmallControls(nPeeps=5000):
+    controls = ControlsType()
+    controls[Ctrls.nPeeps] = nPeeps
+    controls[Ctrls.pHaveWatch] = 0.05
+    return controls
+
+
+def RunDays(model, first, last):
+    for day in range(first, last):
+        model.DayStats(day - 1)
+        model.NextDay(day)
+
+
+class CheckpointTest(unittest.TestCase):
+    def test_resume(self):
+        # a run loaded from a checkpoint goes on exactly as the run that saved it
+        model = SirModel(SmallControls(), seed=7)
+        RunDays(model, 1, 30)
+        model.Reset()
+        RunDays(model, 1, 20)
+
+        fileName = os.path.join(tempfile.mkdtemp(), 'test.sirck')
+        SaveCheckpoint(model, fileName)
+        RunDays(model, 20, 50)
+
+        loaded = LoadCheckpoint(fileName)
+        RunDays(loaded, 20, 50)
+        self.assertTrue(np.array_equal(loaded.RunStats, model.RunStats))
+        self.assertTrue(np.array_equal(np.sort(loaded.dead.Items()), np.sort(model.dead.Items())))
+        self.assertTrue(np.allclose(loaded.Stats.Mean(60, True), model.Stats.Mean(60, True)))
+        loaded.store.Release()
+
+    def test_into_model(self):
+        # loaded over a mapped model that ran something else, the run goes on the same
+        model = SirModel(SmallControls(), seed=22)
+        RunDays(model, 1, 15)
+        folder = tempfile.mkdtemp()
+        fileName = os.path.join(folder, 'test.sirck')
+        SaveCheckpoint(model, fileName)
+        RunDays(model, 15, 40)
+
+        other = SirModel(SmallControls(3000), seed=23, folder=os.path.join(folder, 'store'))
+        RunDays(other, 1, 10)
+        loaded = LoadCheckpoint(fileName, other)
+        self.assertIs(loaded, other)
+        RunDays(loaded, 15, 40)
+        self.assertTrue(np.array_equal(loaded.RunStats, model.RunStats))
+        self.assertTrue(np.array_equal(np.sort(loaded.infected.Items()), np.sort(model.infected.Items())))
+        loaded.store.Release()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from collections import Counter
+
+import numpy as np
+
+from ContactLog import ContactLogType
+
+
+class ContactLogTest(unittest.TestCase):
+    def test_notify(self):
+        # the contacts of the notified sources, each with its number of warnings, and the rest of the log kept
+        rng = np.random.default_rng(13)
+        log = ContactLogType(capacity=4)
+        entries = []
+        for day in range(30):
+            sources = rng.integers(0, 50, rng.integers(0, 20))
+            contacts = rng.integers(0, 200, sources.size)
+            log.Append(sources, contacts, day)
+            entries += list(zip(sources.tolist(), contacts.tolist(), [day] * sources.size))
+
+            needTest = rng.integers(0, 50, 5)
+            warned = [entry for entry in entries if entry[0] in set(needTest.tolist())]
+            entries = [entry for entry in entries if entry[0] not in set(needTest.tolist())]
+            expected = Counter(contact for _, contact, _ in warned)
+
+            contacts, nWarnings = log.Notify(needTest)
+            self.assertEqual(dict(zip(contacts.tolist(), nWarnings.tolist())), dict(expected))
+            self.assertEqual(len(log), len(entries))
+            kept = list(zip(log.source[:len(log)].tolist(), log.contact[:len(log)].tolist(),
+                            log.day[:len(log)].tolist()))
+            self.assertEqual(sorted(kept), sorted(entries))
+
+    def test_single_source(self):
+        # one watch wearer and the guys he infected, as the loop mode appends them
+        log = ContactLogType()
+        log.Append(7, np.array([1, 2, 3]), 4)
+        log.Append(8, np.array([2]), 5)
+        contacts, nWarnings = log.Notify(np.array([7, 8]))
+        self.assertEqual(contacts.tolist(), [1, 2, 3])
+        self.assertEqual(nWarnings.tolist(), [1, 2, 1])
+        self.assertEqual(len(log), 0)
+        log.Append(9, np.array([5]), 6)
+        log.Clear()
+        self.assertEqual(len(log.Notify(np.array([9]))[0]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
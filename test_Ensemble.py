@@ -0,0 +1,67 @@
+import unittest
+
+import numpy as np
+
+from Ensemble import StopRuleType, OutcomeType, RunAdaptive, Outcomes
+from SirModel import ControlsType, Ctrls
+
+
+def Outcomes3(values):
+    # sample x OutcomeType with the same values in every outcome the default rule looks at
+    outcomes = np.zeros((len(values), OutcomeType.lastOutcome))
+    for outcome in (OutcomeType.peakNewInfected, OutcomeType.dead, OutcomeType.isolated):
+        outcomes[:, outcome] = values
+    return outcomes
+
+
+class StopRuleTest(unittest.TestCase):
+    def test_done(self):
+        rule = StopRuleType(tolerance=0.05, minSamples=5, maxSamples=50)
+        self.assertFalse(rule.Done(Outcomes3([100] * 4)))  # too few, however tight
+        self.assertTrue(rule.Done(Outcomes3([100] * 5)))
+        self.assertFalse(rule.Done(Outcomes3([50, 150] * 5)))
+        self.assertTrue(rule.Done(Outcomes3([50, 150] * 25)))  # maxSamples, however wide
+
+        # the half width against the tolerance: 1.96 * sd / sqrt(n) <= 0.05 * mean
+        values = np.tile([90.0, 110.0], 30)
+        halfWidth = rule.z * values.std(ddof=1) / np.sqrt(len(values))
+        self.assertTrue(np.allclose(rule.HalfWidths(Outcomes3(values)), halfWidth))
+        self.assertEqual(rule.Done(Outcomes3(values)), halfWidth <= 5)
+        self.assertTrue(StopRuleType(tolerance=halfWidth / 100 + 1e-9, maxSamples=100).Done(Outcomes3(values)))
+        self.assertFalse(StopRuleType(tolerance=halfWidth / 100 - 1e-9, maxSamples=100).Done(Outcomes3(values)))
+
+    def test_zero_means(self):
+        # a mean of 0 counts as 1: an ensemble with no deaths can still stop
+        rule = StopRuleType(tolerance=0.5, minSamples=2)
+        outcomes = Outcomes3([100] * 10)
+        outcomes[:, OutcomeType.dead] = 0
+        self.assertTrue(rule.Done(outcomes))
+        outcomes[0, OutcomeType.dead] = 10
+        self.assertFalse(rule.Done(outcomes))
+
+    def test_every_outcome(self):
+        # one outcome too wide keeps the ensemble going, and outcomes the rule does not look at do not
+        rule = StopRuleType(tolerance=0.05, outcomes=(OutcomeType.dead,), minSamples=2)
+        outcomes = Outcomes3([100] * 10)
+        outcomes[:, OutcomeType.peakNewInfected] = np.arange(10) * 100
+        self.assertTrue(rule.Done(outcomes))
+        self.assertFalse(StopRuleType(tolerance=0.05, minSamples=2).Done(outcomes))
+
+
+class AdaptiveTest(unittest.TestCase):
+    def test_workers(self):
+        # the rule looks at the samples in stream order: where it stops does not depend on the workers
+        controls = ControlsType()
+        controls[Ctrls.nPeeps] = 3000
+        rule = StopRuleType(tolerance=0.3, minSamples=3, maxSamples=12)
+        one = RunAdaptive(controls, None, rule, 60, nWorkers=1, seed=32)
+        three = RunAdaptive(controls, None, rule, 60, nWorkers=3, seed=32)
+        self.assertTrue(np.array_equal(one, three))
+
+        outcomes = np.array([Outcomes(one[:, sample]) for sample in range(one.shape[1])])
+        self.assertTrue(rule.Done(outcomes))
+        self.assertTrue(one.shape[1] == rule.minSamples or not rule.Done(outcomes[:-1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+from EnsembleStats import EnsembleStatsType, PadDays
+
+
+class EnsembleStatsTest(unittest.TestCase):
+    def test_welford(self):
+        # samples of different lengths: the stats are those of the samples padded with 0s to the longest
+        rng = np.random.default_rng(5)
+        samples = [rng.poisson(5, (3, rng.integers(1, 40))).astype(float) for _ in range(30)]
+        stats = EnsembleStatsType(3)
+        for sample in samples:
+            stats.Add(sample)
+
+        padded = np.array([PadDays(sample, 50) for sample in samples])
+        for cumulative in (False, True):
+            x = np.cumsum(padded, axis=2) if cumulative else padded
+            self.assertTrue(np.allclose(stats.Mean(50, cumulative), x.mean(axis=0)))
+            self.assertTrue(np.allclose(stats.Var(50, cumulative), x.var(axis=0, ddof=1)))
+
+    def test_current(self):
+        # the mean with a running sample is the mean had it been added
+        rng = np.random.default_rng(18)
+        samples = [rng.poisson(5, (3, 20)).astype(float) for _ in range(6)]
+        stats = EnsembleStatsType(3)
+        for sample in samples[:-1]:
+            stats.Add(sample)
+
+        current = stats.Mean(20, True, samples[-1])
+        stats.Add(samples[-1])
+        self.assertTrue(np.allclose(current, stats.Mean(20, True)))
+
+    def test_quantile(self):
+        # while every sample fits in the reservoir, the quantiles are those of all the samples
+        rng = np.random.default_rng(19)
+        samples = np.array([rng.poisson(5, (3, 10)).astype(float) for _ in range(40)])
+        stats = EnsembleStatsType(3, reservoirSize=50)
+        for sample in samples:
+            stats.Add(sample)
+
+        q = [0.1, 0.5, 0.9]
+        self.assertTrue(np.allclose(stats.Quantile(q, 10), np.quantile(samples, q, axis=0)))
+        self.assertTrue(np.allclose(stats.Quantile(q, 10, True), np.quantile(np.cumsum(samples, axis=2), q, axis=0)))
+
+    def test_generation(self):
+        stats = EnsembleStatsType(3)
+        generation = stats.generation
+        stats.Add(np.ones((3, 4)))
+        stats.Clear()
+        stats.Add(np.ones((3, 4)))
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats.generation, generation + 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
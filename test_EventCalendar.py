@@ -0,0 +1,47 @@
+import unittest
+
+import numpy as np
+
+from EventCalendar import EventCalendarType, EventType
+
+
+class EventCalendarTest(unittest.TestCase):
+    def test_schedule_pop(self):
+        # every guy comes out on his day and event, once, whether scheduled with one day or a day each
+        rng = np.random.default_rng(12)
+        calendar = EventCalendarType()
+        expected = {}
+        for _ in range(50):
+            event = EventType(rng.integers(0, EventType.lastEvent))
+            ids = rng.integers(0, 1000, rng.integers(0, 30))
+            if rng.random() < 0.3:
+                days = int(rng.integers(0, 20))
+                calendar.Schedule(days, event, ids)
+                daysEach = np.full(ids.size, days)
+            else:
+                daysEach = rng.integers(0, 20, ids.size)
+                calendar.Schedule(daysEach, event, ids)
+
+            for day, ii in zip(daysEach.tolist(), ids.tolist()):
+                expected.setdefault((day, event), []).append(ii)
+
+        for day in range(20):
+            for event in range(EventType.lastEvent):
+                popped = calendar.Pop(day, event)
+                self.assertEqual(popped.dtype, np.int64)
+                self.assertEqual(sorted(popped.tolist()), sorted(expected.get((day, event), [])))
+                self.assertEqual(len(calendar.Pop(day, event)), 0)
+
+        self.assertEqual(calendar.buckets, {})
+
+    def test_clear(self):
+        calendar = EventCalendarType()
+        calendar.Schedule(3, EventType.die, [1, 2])
+        calendar.Schedule([4, 5], EventType.recover, [3, 4])
+        calendar.Clear()
+        self.assertEqual(len(calendar.Pop(3, EventType.die)), 0)
+        self.assertEqual(len(calendar.Pop(4, EventType.recover)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
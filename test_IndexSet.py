@@ -0,0 +1,39 @@
+import unittest
+
+import numpy as np
+
+from IndexSet import IndexSetType
+
+
+class IndexSetTest(unittest.TestCase):
+    def test_add_remove(self):
+        rng = np.random.default_rng(4)
+        guys = IndexSetType(300)
+        expected = set()
+        for _ in range(200):
+            ids = rng.integers(0, 300, rng.integers(0, 40))
+            if rng.random() < 0.5:
+                guys.Add(ids)
+                expected |= set(ids.tolist())
+            else:
+                guys.Remove(ids)
+                expected -= set(ids.tolist())
+
+            items = guys.Items()
+            self.assertEqual(sorted(items.tolist()), sorted(expected))
+            self.assertTrue(np.array_equal(guys.where[items], np.arange(len(guys))))
+            self.assertEqual(np.count_nonzero(guys.where >= 0), len(guys))
+            self.assertTrue(np.array_equal(guys.Contains(np.arange(300)), np.isin(np.arange(300), items)))
+
+    def test_clear(self):
+        guys = IndexSetType(50)
+        guys.Add([3, 7, 7, 49])
+        guys.Clear()
+        self.assertEqual(len(guys), 0)
+        self.assertFalse(guys.Contains(np.arange(50)).any())
+        guys.Add([7])
+        self.assertEqual(guys.Items().tolist(), [7])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from PopulationCache import PopulationCacheType
+from SirModel import SirModel, ControlsType, Ctrls, Cols
+
+
+def Structure(value, n=100):
+    # a population's arrays as BuildStructure names them: n int64 guys take 8 * n bytes a column
+    return {'family.indptr': np.full(n, value, dtype=np.int64), 'data.family': np.full(n, value, dtype=np.int64)}
+
+
+class PopulationCacheTest(unittest.TestCase):
+    def test_lru(self):
+        # above maxBytes the least recently used go, the newest always stays
+        cache = PopulationCacheType(maxBytes=2 * 1600)
+        cache.Put('a', Structure(1))
+        cache.Put('b', Structure(2))
+        self.assertEqual(cache.Get('a')['data.family'][0], 1)  # a is now the most recently used
+        cache.Put('c', Structure(3))
+        self.assertEqual(list(cache.entries), ['a', 'c'])
+        self.assertIsNone(cache.Get('b'))
+        self.assertEqual(cache.nBytes, 2 * 1600)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        cache.Put('c', Structure(3))
+        self.assertEqual(cache.nBytes, 2 * 1600)
+        cache.Put('big', Structure(4, 1000))
+        self.assertEqual(list(cache.entries), ['big'])
+        self.assertEqual(cache.nBytes, 16000)
+        with self.assertRaises(ValueError):
+            cache.Get('big')['data.family'][0] = 0  # shared arrays are read only
+
+    def test_disk(self):
+        # every population goes to the folder, and comes back from it once the memory tier dropped it
+        folder = tempfile.mkdtemp()
+        cache = PopulationCacheType(maxBytes=1600, folder=folder)
+        cache.Put('a', Structure(1))
+        cache.Put('b', Structure(2), keep=False)
+        self.assertEqual(list(cache.entries), ['a'])
+        self.assertEqual(sorted(os.listdir(folder)), ['a.sirpop', 'b.sirpop'])
+
+        other = PopulationCacheType(folder=folder)  # another process
+        for key, value in (('a', 1), ('b', 2)):
+            structure = other.Get(key)
+            self.assertEqual(sorted(structure), sorted(Structure(value)))
+            for name, array in Structure(value).items():
+                self.assertTrue(np.array_equal(structure[name], array))
+        self.assertEqual((other.hits, other.misses), (2, 0))
+
+        cache.Clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.Get('b')['data.family'][0], 2)
+        self.assertIsNone(cache.Get('c'))
+
+    def test_models_share(self):
+        # the same seed and stream on the same structural controls get the cached population, and run the same
+        controls = ControlsType()
+        controls[Ctrls.nPeeps] = 5000
+        cache = PopulationCacheType(folder=tempfile.mkdtemp())
+        runs = []
+        for populations in (None, cache, cache, PopulationCacheType(folder=cache.folder)):
+            model = SirModel(controls, seed=24, reset=False)
+            model.populations = populations
+            model.Reset(3)
+            runs.append((model.family.indices.copy(), model.data.columns[Cols.family].copy()))
+            for day in range(1, 20):
+                model.DayStats(day - 1)
+                model.NextDay(day)
+            runs[-1] += (model.RunStats.copy(),)
+
+        for run in runs[1:]:
+            for mine, first in zip(run, runs[0]):
+                self.assertTrue(np.array_equal(mine, first))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+import numpy as np
+
+from PopulationImage import PopulationImageType, PixelType, PixelRgb
+from SirModel import SirModel, ControlsType, Ctrls
+
+
+def SmallControls(nPeeps=5000):
+    controls = ControlsType()
+    controls[Ctrls.nPeeps] = nPeeps
+    controls[Ctrls.pHaveWatch] = 0.05
+    return controls
+
+
+def RunDays(model, first, last):
+    for day in range(first, last):
+        model.DayStats(day - 1)
+        model.NextDay(day)
+
+
+class PopulationImageTest(unittest.TestCase):
+    def test_update(self):
+        # an image updated day by day is the image built from scratch, binned or not
+        for maxCols in (1100, 16):
+            model = SirModel(SmallControls(), seed=8)
+            image = PopulationImageType()
+            image.maxCols = image.maxRows = maxCols
+            image.Update(model)
+            for day in range(1, 40):
+                RunDays(model, day, day + 1)
+                updated = image.Update(model).copy()
+
+                built = PopulationImageType()
+                built.maxCols = built.maxRows = maxCols
+                built.Build(model)
+                self.assertTrue(np.array_equal(updated, built.image))
+
+    def test_unbinned(self):
+        # a pixel per guy, in his colour
+        model = SirModel(SmallControls(), seed=20)
+        image = PopulationImageType()
+        image.Build(model)
+        self.assertEqual(image.binSize, 1)
+        rgb = image.image.reshape(-1, 3)
+        self.assertTrue(np.array_equal(rgb[:model.data.nPeeps], PixelRgb[image.pixels]))
+        self.assertTrue((rgb[model.data.nPeeps:] == 255).all())
+
+    def test_bin_colors(self):
+        # a bin is as much of a colour as its guys are: the background counts too
+        image = PopulationImageType()
+        counts = np.zeros((3, PixelType.lastPixel), dtype=np.int64)
+        counts[0, [PixelType.nobody, PixelType.serviceSuscept]] = [95, 5]
+        counts[1, PixelType.infected] = 7
+        self.assertEqual(image.BinColors(counts).tolist(), [[242, 242, 255], [255, 0, 0], [255, 255, 255]])
+
+    def test_binned_shares(self):
+        # over the whole image, the bins show each colour in the share of the guys that have it
+        controls = SmallControls(100000)
+        controls[Ctrls.pServiceGuy] = 0.05
+        model = SirModel(controls, seed=21)
+        RunDays(model, 1, 30)
+        image = PopulationImageType()
+        image.maxCols = image.maxRows = 40
+        image.Build(model)
+        self.assertGreater(image.binSize, 1)
+
+        weights = image.counts.sum(axis=1)
+        shown = (image.image.reshape(-1, 3) * weights[:, None]).sum(axis=0) / weights.sum()
+        true = PixelRgb[image.pixels].mean(axis=0)
+        self.assertLess(np.abs(shown - true).max(), 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import math
+import unittest
+
+import numpy as np
+
+from RandomPool import RandomPoolType
+
+
+class RandomPoolTest(unittest.TestCase):
+    def test_uniform_stream(self):
+        # the slices handed out are the Generator's own stream, however the blocks fall
+        pool = RandomPoolType(np.random.default_rng(14))
+        rng = np.random.default_rng(14)
+        sizes = [5, 70000, 0, 3, 140000, 1]
+        drawn = []
+        for size in sizes:
+            pool.StartDay()
+            drawn.append(pool.Uniform(size).copy())
+
+        self.assertTrue(np.array_equal(np.concatenate(drawn), rng.random(sum(sizes))))
+
+    def test_poisson(self):
+        pool = RandomPoolType(np.random.default_rng(15))
+        n = 200000
+        for lam in (0, 0.5, 2, 10):
+            k = pool.Poisson(lam, n)
+            self.assertEqual(len(k), n)
+            pmf = np.array([math.exp(-lam) * lam ** j / math.factorial(j) for j in range(int(lam) + 3)])
+            freq = np.bincount(k, minlength=len(pmf))[:len(pmf)] / n
+            self.assertLess(np.abs(freq - pmf).max(), 4 * math.sqrt(0.25 / n), lam)
+            self.assertLess(abs(k.mean() - lam), 4 * math.sqrt(max(lam, 1e-3) / n) + 1e-9, lam)
+
+        # the given uniforms decide the draw
+        u = np.array([0.0, 0.2, 0.6, 0.99])
+        self.assertEqual(pool.Poisson(2, 4, u).tolist(), [0, 1, 2, 6])
+
+    def test_geometric(self):
+        pool = RandomPoolType(np.random.default_rng(16))
+        n = 200000
+        for p in (0.05, 0.54, 0.9):
+            days = pool.Geometric(p, n)
+            self.assertGreaterEqual(days.min(), 1)
+            pmf = np.array([(1 - p) ** (j - 1) * p for j in range(1, 6)])
+            freq = np.bincount(days, minlength=6)[1:6] / n
+            self.assertLess(np.abs(freq - pmf).max(), 4 * math.sqrt(0.25 / n), p)
+
+        self.assertTrue(np.array_equal(pool.Geometric(1, 10), np.ones(10)))
+
+    def test_keyed(self):
+        # the same seed, purpose and keys give the same uniform whatever else is drawn; anything else changes it
+        ids = np.arange(100000)
+        pool = RandomPoolType(np.random.default_rng(17), keySeed=42)
+        u = pool.Keyed(1, ids, 7)
+        pool.Uniform(1000)
+        self.assertTrue(np.array_equal(pool.Keyed(1, ids, 7), u))
+        self.assertTrue(np.array_equal(RandomPoolType(np.random.default_rng(0), keySeed=42).Keyed(1, ids, 7), u))
+        self.assertTrue(np.array_equal(pool.Keyed(1, ids[::-1], 7), u[::-1]))
+
+        self.assertTrue(((u >= 0) & (u < 1)).all())
+        self.assertLess(abs(u.mean() - 0.5), 0.01)
+        self.assertLess(np.abs(np.bincount((u * 10).astype(int), minlength=10) / ids.size - 0.1).max(), 0.01)
+        for other in (pool.Keyed(2, ids, 7), pool.Keyed(1, ids, 8), RandomPoolType(None, 43).Keyed(1, ids, 7)):
+            self.assertLess(np.mean(other == u), 0.001)
+            self.assertLess(abs(np.corrcoef(other, u)[0, 1]), 0.02)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from ResultCache import ResultCacheType, ResultKey
+from SirModel import ControlsType
+
+
+class ResultCacheTest(unittest.TestCase):
+    def test_trim(self):
+        # over maxBytes the least recently used results go, down to 3/4 of it
+        cache = ResultCacheType(tempfile.mkdtemp(), maxBytes=1 << 30)
+        stats = np.zeros((4, 100))
+        for n in range(10):
+            cache.Put(str(n), stats + n)
+        size = os.path.getsize(cache.FileName('0'))
+
+        # oldest first, except 2 that was just used
+        now = time.time()
+        for n in range(10):
+            os.utime(cache.FileName(str(n)), (now - 100 + n, now - 100 + n))
+        self.assertEqual(cache.Get('2')[0, 0], 2)
+
+        cache.maxBytes = 8 * size
+        cache.Trim()
+        kept = sorted(os.path.basename(fileName)[:-4] for _, _, fileName in cache.Files())
+        self.assertEqual(kept, ['2', '5', '6', '7', '8', '9'])
+        self.assertEqual(cache.nBytes, 6 * size)
+
+        # a Put trims once the results are over maxBytes again
+        for n in range(10, 13):
+            cache.Put(str(n), stats)
+        kept = sorted(os.path.basename(fileName)[:-4] for _, _, fileName in cache.Files())
+        self.assertEqual(kept, ['10', '11', '12', '2', '8', '9'])
+        self.assertEqual(cache.nBytes, sum(size for _, size, _ in cache.Files()))
+
+    def test_seed(self):
+        # the seed stays with the folder until a new one is asked for
+        folder = tempfile.mkdtemp()
+        seed = ResultCacheType(folder).Seed()
+        self.assertEqual(ResultCacheType(folder).Seed(), seed)
+        newSeed = ResultCacheType(folder).NewSeed()
+        self.assertNotEqual(newSeed, seed)
+        self.assertEqual(ResultCacheType(folder).Seed(), newSeed)
+
+    def test_key(self):
+        controls = ControlsType()
+        key = ResultKey(controls, None, 1, 2, 200)
+        self.assertEqual(ResultKey(ControlsType([str(x) for x in controls]), None, 1, 2, 200), key)
+        for other in (ResultKey(controls, None, 1, 3, 200), ResultKey(controls, None, 1, 2, 201),
+                      ResultKey(controls, None, 1, 2, 200, paired=True)):
+            self.assertNotEqual(other, key)
+
+
+if __name__ == '__main__':
+    unittest.main()
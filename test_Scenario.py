@@ -0,0 +1,91 @@
+import unittest
+
+from Scenario import ControlsTable, SceneTimeline, SceneStatus
+from SirModel import Ctrls, GetValue
+
+
+class OldWindowScenario:  # how ControlsWindow loaded and stepped a scenario before SceneTimeline, on the csv rows
+    def __init__(self, rows, colFrom):
+        ColVsName = {rows[0][col].strip(): col for col in range(1, len(rows[0])) if rows[0][col].strip() != ''}
+        self.Scenario = []
+        for row in range(1, len(rows)):
+            text = rows[row][colFrom].strip() if colFrom < len(rows[row]) else ''
+            if text == '':     # end of scenario
+                break
+
+            cCol = ColVsName[text]
+            self.Scenario.append((rows[row][colFrom + 1].strip(),
+                                  [rows[cRow][cCol].strip() for cRow in range(1, int(Ctrls.LastCtrl) + 1)]))
+
+        self.FirstDay()
+
+    def CopySceneControls(self):
+        self.values = [GetValue(text) for text in self.Scenario[self.nthCtrls][1]]
+
+    def FirstDay(self):
+        self.SceneDays = 0
+        self.nthCtrls = 0
+        self.sceneStatus = SceneStatus.run
+        self.CopySceneControls()
+
+    def NextDay(self):
+        self.SceneDays += 1
+        if GetValue(self.Scenario[self.nthCtrls][0]) < self.SceneDays:
+            self.nthCtrls += 1
+            if self.nthCtrls >= len(self.Scenario):
+                self.sceneStatus = SceneStatus.end
+                self.nthCtrls = 0
+                return
+
+            self.SceneDays = 0
+            self.CopySceneControls()
+
+
+def Table(phases):
+    # three control sets that differ in nPeeps and pRecover, and a Scenario column of (name, days) phases
+    defaults = Ctrls.GetDefaults()
+    rows = [['Ctrl Name', 'A', 'B', 'C', 'Scenario', '']]
+    for ctrl in range(int(Ctrls.LastCtrl)):
+        values = [defaults[ctrl]] * 3
+        if ctrl == Ctrls.nPeeps:
+            values = [1000, 2000, 3000]
+        elif ctrl == Ctrls.pRecover:
+            values = [0.1, 0.2, 0.3]
+        phase = phases[ctrl] if ctrl < len(phases) else ('', '')
+        rows.append([Ctrls(ctrl).name] + [str(value) for value in values] + list(phase))
+
+    return rows
+
+
+class SceneTimelineTest(unittest.TestCase):
+    def Check(self, rows, name, nDays):
+        # day by day, the timeline runs the controls the window ran and ends when the window ended
+        table = ControlsTable(rows)
+        old = OldWindowScenario(rows, table.Column(name))
+        timeline = SceneTimeline(table.Scenario(name))
+        controls = timeline.FirstDay()
+        self.assertEqual(list(controls), old.values)
+        for day in range(nDays):
+            changed = timeline.NextDay()
+            old.NextDay()
+            if changed is not None:
+                controls = changed
+
+            self.assertEqual(timeline.sceneStatus, old.sceneStatus, day)
+            if old.sceneStatus == SceneStatus.end:
+                break
+
+            self.assertEqual(timeline.nthCtrls, old.nthCtrls, day)
+            self.assertEqual(list(controls), old.values, day)
+
+        self.assertEqual(timeline.sceneStatus, SceneStatus.end)
+
+    def test_phases(self):
+        for phases in ([('A', '5'), ('B', '3'), ('C', '7')],
+                       [('B', '0'), ('A', '1'), ('B', '0')],
+                       [('C', '10')]):
+            self.Check(Table(phases), 'Scenario', 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
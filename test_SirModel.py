@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+
+from SirModel import SirModel, ControlsType, Ctrls, Cols, GroupedChoice
+
+
+def SmallControls(nPeeps=5000):
+    controls = ControlsType()
+    controls[Ctrls.nPeeps] = nPeeps
+    controls[Ctrls.pHaveWatch] = 0.05
+    return controls
+
+
+class GroupedChoiceTest(unittest.TestCase):
+    def test_picks(self):
+        rng = np.random.default_rng(1)
+        owner = np.sort(rng.integers(0, 50, 2000))
+        nPick = rng.integers(0, 60, 50)
+        kept = GroupedChoice(owner, 50, nPick, rng.random(owner.size))
+
+        self.assertEqual(len(np.unique(kept)), len(kept))
+        counts = np.bincount(owner[kept], minlength=50)
+        self.assertTrue(np.array_equal(counts, np.minimum(nPick, np.bincount(owner, minlength=50))))
+
+    def test_uniform(self):
+        # every entry of a group is as likely to be picked
+        rng = np.random.default_rng(2)
+        owner = np.zeros(10, dtype=int)
+        picked = np.zeros(10)
+        for _ in range(4000):
+            picked[GroupedChoice(owner, 1, np.array([3]), rng.random(10))] += 1
+
+        self.assertLess(np.abs(picked / 4000 - 0.3).max(), 0.04)
+
+
+class SampleStrangersTest(unittest.TestCase):
+    def test_strangers(self):
+        # StgrsPerDay different guys of the window, none of them family or friends, or all the window has
+        controls = SmallControls()
+        controls[Ctrls.StrangerRadius] = 12  # windows small enough to be crowded: service guys keep roomy ones
+        controls[Ctrls.StgrsPerDay] = 8
+        model = SirModel(controls, seed=6)
+        spreaders = np.arange(0, 5000, 7)
+        owner, strangers = model.SampleStrangers(spreaders)
+
+        for n, ii in enumerate(spreaders):
+            mine = strangers[owner == n]
+            service = model.data[ii, Cols.serviceGuy] == 1
+            radius = controls[Ctrls.ServStgrRadius] if service else controls[Ctrls.StrangerRadius]
+            nWanted = controls[Ctrls.ServStgrPerDay] if service else controls[Ctrls.StgrsPerDay]
+            family = model.family.Row(ii)
+            window = set(range(max(0, ii - radius), family[0])) | \
+                     set(range(min(family[-1] + 1, 4999), min(ii + radius, 4999)))
+            window -= set(model.friends.Row(ii).tolist())
+
+            self.assertEqual(len(np.unique(mine)), len(mine))
+            self.assertTrue(set(mine.tolist()) <= window)
+            self.assertEqual(len(mine), min(nWanted, len(window)))
+
+    def test_matches_loop(self):
+        # the loop mode's GetStrangers picks as many guys of the same window, none wanted or not
+        for nStrangers in (5, 0):
+            controls = SmallControls()
+            controls[Ctrls.StgrsPerDay] = nStrangers
+            controls[Ctrls.ServStgrPerDay] = 2 * nStrangers
+            model = SirModel(controls, seed=33)
+            spreaders = np.arange(0, 5000, 11)
+            owner, strangers = model.SampleStrangers(spreaders)
+            for n, ii in enumerate(spreaders):
+                mine = strangers[owner == n]
+                loop = model.GetStrangers(ii)
+                self.assertEqual(len(loop), len(mine))
+                self.assertEqual(len(np.unique(loop)), len(loop))
+                self.assertFalse(np.isin(loop, model.friends.Row(ii)).any())
+                self.assertFalse(np.isin(loop, model.family.Row(ii)).any())
+
+
+if __name__ == '__main__':
+    unittest.main()
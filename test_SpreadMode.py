@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from Ensemble import RunSample, Outcomes, OutcomeType
+from SirModel import SirModel, ControlsType, Ctrls, SpreadMode
+
+
+def SmallControls(nPeeps=5000):
+    controls = ControlsType()
+    controls[Ctrls.nPeeps] = nPeeps
+    controls[Ctrls.pHaveWatch] = 0.05
+    return controls
+
+
+class SpreadModeTest(unittest.TestCase):
+    def test_batch_matches_loop(self):
+        # the batch mode runs the same model as the per-guy loop: the means of their outcomes agree
+        outcomes = {}
+        for mode in (SpreadMode.batch, SpreadMode.loop):
+            samples = []
+            for stream in range(8):
+                model = SirModel(SmallControls(20000), seed=9, reset=False)
+                model.spreadMode = mode
+                model.Reset(stream)
+                samples.append(Outcomes(RunSample(model, None, 60)))
+            outcomes[mode] = np.array(samples)
+
+        for outcome in (OutcomeType.totalInfected, OutcomeType.dead, OutcomeType.isolated):
+            batch, loop = outcomes[SpreadMode.batch][:, outcome], outcomes[SpreadMode.loop][:, outcome]
+            stdErr = np.sqrt((batch.var(ddof=1) + loop.var(ddof=1)) / len(batch))
+            self.assertLess(abs(batch.mean() - loop.mean()), 4 * stdErr + 1, OutcomeType(outcome).name)
+
+    def test_no_strangers(self):
+        # nobody meets strangers: both modes spread through family and friends only
+        controls = SmallControls()
+        controls[Ctrls.StgrsPerDay] = 0
+        controls[Ctrls.ServStgrPerDay] = 0
+        for mode in (SpreadMode.batch, SpreadMode.loop):
+            model = SirModel(controls, seed=10, reset=False)
+            model.spreadMode = mode
+            model.Reset(0)
+            self.assertEqual(len(model.GetStrangers(1000)), 0)
+            stats = RunSample(model, None, 30)
+            self.assertGreater(Outcomes(stats)[OutcomeType.totalInfected], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from statistics import NormalDist
+
+import numpy as np
+
+from SirModel import ControlsType, Ctrls
+from Sweep import VaryType, GridDesign, LatinHypercube, RandomDesign, PointControls, RunSweep
+
+
+class VaryTest(unittest.TestCase):
+    def test_parse(self):
+        vary = VaryType.Parse('pInfectStgr=0.005:0.05:40')
+        self.assertEqual((vary.ctrl, vary.low, vary.high, vary.nSteps, vary.dist),
+                         (Ctrls.pInfectStgr, 0.005, 0.05, 40, 'uniform'))
+        vary = VaryType.Parse('FriendsPerDay=1:4@normal')
+        self.assertEqual((vary.ctrl, vary.nSteps, vary.dist), (Ctrls.FriendsPerDay, None, 'normal'))
+        for text in ('pInfect=0:1', 'pTest=0:1:2:3', 'pTest=0:1@cauchy', 'pTest=0:1@log', 'LastCtrl=0:1'):
+            with self.assertRaises(ValueError):
+                VaryType.Parse(text)
+
+    def test_counts(self):
+        # only the controls that count guys or days are rounded: the Poisson means keep their fractions
+        for name, isCount in (('nFriends', True), ('StgrsPerDay', True), ('Test2Isolate', True),
+                              ('FriendsPerDay', False), ('nInFamily', False), ('pTest', False)):
+            vary = VaryType(Ctrls[name], 1, 4)
+            self.assertEqual(vary.IsCount(), isCount, name)
+            value = vary.At(0.3)
+            self.assertEqual(value, 2 if isCount else 1.9, name)
+            self.assertIsInstance(PointControls(ControlsType(), [vary], [value])[Ctrls[name]], int if isCount else float)
+
+    def test_log(self):
+        # uniform in the log: as many values in each decade
+        vary = VaryType(Ctrls.pInfectStgr, 0.001, 0.1, dist='log')
+        self.assertTrue(np.allclose(vary.At([0, 0.5, 1]), [0.001, 0.01, 0.1]))
+        values = LatinHypercube([vary], 1000, np.random.default_rng(25))[:, 0]
+        self.assertEqual(np.count_nonzero(values < 0.01), 500)
+        self.assertTrue(np.allclose(vary.Steps(3), [0.001, 0.01, 0.1]))
+
+    def test_normal(self):
+        # low to high is the middle 95%, and the values stay where the control can go
+        vary = VaryType(Ctrls.FriendsPerDay, 1, 3, dist='normal')
+        values = LatinHypercube([vary], 2000, np.random.default_rng(26))[:, 0]
+        self.assertAlmostEqual(values.mean(), 2, places=2)
+        self.assertAlmostEqual(np.mean((values > 1) & (values < 3)), 0.95, places=2)
+        self.assertTrue(np.allclose(vary.Steps(3), 2 + np.array([-1, 0, 1]) * NormalDist().inv_cdf(5 / 6) / 1.96))
+
+        wide = VaryType(Ctrls.pTest, 0, 1, dist='normal')
+        values = RandomDesign([wide], 2000, np.random.default_rng(27))[:, 0]
+        self.assertTrue((values >= 0).all() and (values <= 1).all())
+        self.assertTrue((values == 0).any() and (values == 1).any())
+
+
+class DesignTest(unittest.TestCase):
+    def setUp(self):
+        self.varies = [VaryType(Ctrls.pInfectStgr, 0.01, 0.05), VaryType(Ctrls.nFriends, 2, 12)]
+
+    def test_grid(self):
+        # every combination of the steps: rounded counts that fall on the same step count once
+        points = GridDesign(self.varies, 25, np.random.default_rng(28))
+        self.assertEqual(points.shape, (25, 2))
+        self.assertTrue(np.allclose(np.unique(points[:, 0]), np.linspace(0.01, 0.05, 5)))
+        self.assertEqual(np.unique(points[:, 1]).tolist(), [2, 4, 7, 10, 12])
+        self.assertEqual(len({tuple(point) for point in points.tolist()}), 25)
+
+        self.varies[1].nSteps = 20
+        points = GridDesign(self.varies, 25, np.random.default_rng(28))
+        self.assertEqual(points.shape, (5 * 11, 2))
+
+    def test_lhs(self):
+        # each of the nPoints slices of each range has one point
+        points = LatinHypercube(self.varies[:1] + [VaryType(Ctrls.FriendsPerDay, 1, 5)], 50,
+                                np.random.default_rng(29))
+        for n, (low, high) in enumerate(((0.01, 0.05), (1, 5))):
+            slices = np.floor((points[:, n] - low) / (high - low) * 50)
+            self.assertEqual(sorted(slices.tolist()), list(range(50)))
+
+    def test_random(self):
+        points = RandomDesign(self.varies, 200, np.random.default_rng(30))
+        self.assertEqual(points.shape, (200, 2))
+        self.assertTrue((points[:, 0] >= 0.01).all() and (points[:, 0] <= 0.05).all())
+        self.assertTrue(np.array_equal(points[:, 1], np.round(points[:, 1])))
+        self.assertTrue((points[:, 1] >= 2).all() and (points[:, 1] <= 12).all())
+
+
+class RunSweepTest(unittest.TestCase):
+    def test_same_streams(self):
+        # sample k of every point runs on stream k: points with the same controls get the same outcomes
+        base = ControlsType()
+        base[Ctrls.nPeeps] = 3000
+        varies = [VaryType(Ctrls.pInfectStgr, 0.01, 0.05)]
+        table = RunSweep(base, varies, np.array([[0.02], [0.04], [0.02]]), 2, 40, nWorkers=2, seed=31)
+        outcomes = table.rows[:, table.firstOutcome:].reshape(3, 2, -1)
+        self.assertFalse(np.isnan(outcomes).any())
+        self.assertTrue(np.array_equal(outcomes[0], outcomes[2]))
+        self.assertFalse(np.array_equal(outcomes[0], outcomes[1]))
+
+
+if __name__ == '__main__':
+    unittest.main()